@@ -13,6 +13,8 @@ a = Analysis(
     datas=[('data', 'data'), ('src', 'src'), ('assets', 'assets')],
     hiddenimports=[
         'uvicorn',
+        'uvloop',
+        'httptools',
         'fastapi',
         'sqlalchemy',
         'sqlite3',
@@ -2,12 +2,13 @@ from fastapi import APIRouter, Response, WebSocket, WebSocketDisconnect
 from src.utils.logger import get_module_logger
 import signal
 import sys
+from rich.traceback import install
 
 # import sys
 from src.utils.config import global_config
 from src.utils.database import initialize_database  # <--- 修改此行
 from src.utils.database import get_db_instance  # 确保导入 get_db_instance
-from src.utils.server import global_server
+from src.utils.server import bind_sockets, get_global_server, run_async
 from src.modules import instance_api
 from src.modules import system  # 添加导入
 from src.modules import deploy_api  # 添加 deploy_api 导入
@@ -20,7 +21,12 @@ from src.modules.websocket_manager import (
 import asyncio  # 添加 asyncio 导入
 from src.utils.tray_icon import TrayIcon, is_tray_available  # 添加托盘图标导入
 
+# rich traceback 会替换全局的 sys.excepthook，只在程序入口安装一次
+# 未捕获异常的回溯只显示出错行本身，不读取额外的源码上下文，也不展开局部变量
+install(extra_lines=0, show_locals=False)
+
 logger = get_module_logger("主程序")
+global_server = get_global_server()
 # --- 从 global_config 加载配置 ---
 HTTP_HOST = global_config.server_host
 HTTP_PORT = global_config.server_port
@@ -117,11 +123,13 @@ global_server.register_router(
     deploy_api.router, prefix=f"{API_PREFIX}/deploy"
 )  # 注册 deploy_api router，并添加 /deploy 前缀
 global_server.register_router(maibot_api.router, prefix=API_PREFIX)
+global_server.enable_batch_endpoint(f"{API_PREFIX}/batch")  # 批量请求端点
 logger.info(f"已包含 API 路由，前缀为：{API_PREFIX}")
 
 # --- 全局变量用于优雅关闭 ---
 shutdown_event = asyncio.Event()
 tray_icon = None  # 全局托盘图标实例
+_main_loop = None  # 主事件循环，供其他线程（如托盘图标）线程安全地触发关闭
 _shutdown_initiated = False  # 标记是否已经开始关闭流程
 
 
@@ -145,7 +153,7 @@ def signal_handler(signum, frame):
 
 
 def shutdown_from_tray():
-    """从托盘图标触发的关闭函数"""
+    """从托盘图标触发的关闭函数（在托盘线程中调用，只发出关闭信号，不阻塞）"""
     global _shutdown_initiated
     if _shutdown_initiated:
         logger.info("托盘图标请求关闭应用程序，但关闭流程已在进行中")
@@ -153,12 +161,18 @@ def shutdown_from_tray():
 
     logger.info("托盘图标请求关闭应用程序")
     _shutdown_initiated = True
-    shutdown_event.set()
+    # asyncio.Event 不是线程安全的，需要交给主事件循环执行
+    if _main_loop is not None:
+        _main_loop.call_soon_threadsafe(shutdown_event.set)
+    else:
+        shutdown_event.set()
 
 
 # --- 服务器启动 ---
 async def main():  # sourcery skip: use-contextlib-suppress
-    global tray_icon, _shutdown_initiated
+    global tray_icon, _shutdown_initiated, _main_loop
+
+    _main_loop = asyncio.get_running_loop()
 
     logger.info("正在启动MaiLauncher后端服务器...")
     logger.info(f"HTTP 和 WebSocket 服务器将在 http://{HTTP_HOST}:{HTTP_PORT} 上启动")
@@ -191,11 +205,10 @@ async def main():  # sourcery skip: use-contextlib-suppress
     logger.info("数据库初始化完成。")
 
     # 启动 Uvicorn 服务器
-    from uvicorn import Config, Server
+    from uvicorn import Server
 
     # Uvicorn 将同时处理 HTTP 和 WebSocket 请求
-    config = Config(
-        app=global_server.app,
+    config = global_server.build_config(
         host=HTTP_HOST,
         port=HTTP_PORT,
         log_level="info",
@@ -206,8 +219,12 @@ async def main():  # sourcery skip: use-contextlib-suppress
     logger.info("Uvicorn 服务器 (HTTP 和 WebSocket) 正在启动...")
 
     try:
+        # 预先绑定监听端口（Windows 上返回 None，由 Uvicorn 自行绑定）
+        sockets = bind_sockets(
+            config.host, config.port, global_config.server_reuse_port
+        )
         # 创建服务器任务
-        server_task = asyncio.create_task(server.serve())
+        server_task = asyncio.create_task(server.serve(sockets=sockets))
 
         # 创建关闭监听任务
         shutdown_task = asyncio.create_task(shutdown_event.wait())
@@ -265,7 +282,7 @@ async def main():  # sourcery skip: use-contextlib-suppress
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())  # 使用 asyncio.run 运行主异步函数
+        run_async(main())  # 在 uvloop（可用时）事件循环中运行主异步函数
     except KeyboardInterrupt:
         logger.info("主程序被键盘中断。")
     except SystemExit:
@@ -8,11 +8,8 @@ from src.modules.instance_manager import (
 )
 from src.utils.generate_instance_id import generate_instance_id
 from src.utils.logger import get_module_logger
-from src.utils.database_model import (
-    DB_Service,
-    DB_Instance,
-)
-from src.utils.database import engine
+from src.utils.database_model import DB_Instance
+from src.utils.database import engine, upsert_services
 from sqlmodel import Session, select
 from sqlalchemy.exc import IntegrityError
 import httpx
@@ -497,6 +494,21 @@ async def get_install_status(instance_id: str):
         raise HTTPException(status_code=500, detail="获取安装状态失败")
 
 
+def _directory_has_entries(path: Path) -> bool:
+    """目录存在且非空时返回True"""
+    try:
+        with os.scandir(path) as entries:
+            return next(entries, None) is not None
+    except (FileNotFoundError, NotADirectoryError):
+        return False
+
+
+def _probe_write_permission(test_file: Path):
+    """创建并删除测试文件以验证写入权限，失败时抛出异常"""
+    test_file.touch()
+    test_file.unlink()
+
+
 async def perform_deployment_background(payload: DeployRequest, instance_id_str: str):
     """
     在后台执行部署任务的异步函数
@@ -550,19 +562,21 @@ async def perform_deployment_background(payload: DeployRequest, instance_id_str:
             logger.info(f"路径不以~开头，不进行展开 (实例ID: {instance_id_str})")
 
         deploy_path = Path(install_path)
+        # 以下文件系统操作在线程中执行，避免阻塞事件循环
+        resolved_deploy_path = await asyncio.to_thread(deploy_path.resolve)
         add_install_log(
-            instance_id_str, f"📍 目标部署路径: {deploy_path.resolve()}", "info"
+            instance_id_str, f"📍 目标部署路径: {resolved_deploy_path}", "info"
         )
 
         # 记录收到的路径信息
         logger.info(f"收到部署路径: {payload.install_path} (实例ID: {instance_id_str})")
         logger.info(f"处理后的路径: {install_path} (实例ID: {instance_id_str})")
         logger.info(
-            f"解析后的绝对路径: {deploy_path.resolve()} (实例ID: {instance_id_str})"
+            f"解析后的绝对路径: {resolved_deploy_path} (实例ID: {instance_id_str})"
         )
 
         # 检查父目录是否存在，如果不存在则尝试创建
-        if not deploy_path.parent.exists():
+        if not await asyncio.to_thread(deploy_path.parent.exists):
             logger.info(
                 f"父目录不存在，尝试创建: {deploy_path.parent} (实例ID: {instance_id_str})"
             )
@@ -570,7 +584,9 @@ async def perform_deployment_background(payload: DeployRequest, instance_id_str:
                 instance_id_str, f"📁 创建父目录: {deploy_path.parent}", "info"
             )
             try:
-                deploy_path.parent.mkdir(parents=True, exist_ok=True)
+                await asyncio.to_thread(
+                    deploy_path.parent.mkdir, parents=True, exist_ok=True
+                )
                 logger.info(
                     f"成功创建父目录: {deploy_path.parent} (实例ID: {instance_id_str})"
                 )
@@ -588,7 +604,7 @@ async def perform_deployment_background(payload: DeployRequest, instance_id_str:
                 return
 
         # 检查目标路径是否已存在实例
-        if deploy_path.exists() and any(deploy_path.iterdir()):
+        if await asyncio.to_thread(_directory_has_entries, deploy_path):
             logger.warning(
                 f"目标路径已存在文件: {deploy_path} (实例ID: {instance_id_str})"
             )
@@ -604,8 +620,7 @@ async def perform_deployment_background(payload: DeployRequest, instance_id_str:
         add_install_log(instance_id_str, "🔐 验证路径写入权限", "info")
         try:
             test_file = deploy_path.parent / f"test_write_{instance_id_str}.tmp"
-            test_file.touch()
-            test_file.unlink()
+            await asyncio.to_thread(_probe_write_permission, test_file)
             add_install_log(instance_id_str, "✅ 路径权限验证通过", "success")
             logger.info(f"路径权限验证通过 (实例ID: {instance_id_str})")
         except Exception as e:
@@ -896,6 +911,7 @@ async def save_instance_to_database(
 
             # 初始化服务状态
             services_status = []
+            service_rows = []
             for service_config in payload.install_services:
                 # 展开服务路径中的 ~ 符号（如果存在）
                 service_path = service_config.path
@@ -916,15 +932,16 @@ async def save_instance_to_database(
                         f"展开服务路径: {service_config.path} -> {service_path} (服务: {service_config.name}, 实例ID: {instance_id_str})"
                     )
 
-                db_service = DB_Service(
-                    instance_id=instance_id_str,
-                    name=service_config.name,
-                    path=service_path,  # 使用展开后的路径
-                    status="pending",
-                    port=service_config.port,
-                    run_cmd=service_config.run_cmd,  # 添加 run_cmd
+                service_rows.append(
+                    {
+                        "instance_id": instance_id_str,
+                        "name": service_config.name,
+                        "path": service_path,  # 使用展开后的路径
+                        "status": "pending",
+                        "port": service_config.port,
+                        "run_cmd": service_config.run_cmd,  # 添加 run_cmd
+                    }
                 )
-                session.add(db_service)
 
                 # 添加到服务状态列表
                 services_status.append(
@@ -944,6 +961,7 @@ async def save_instance_to_database(
                 "阶段4/4: 后端记录数据库 - 正在保存配置到数据库",
             )
 
+            upsert_services(session, service_rows)
             session.commit()
             add_install_log(
                 instance_id_str,
@@ -11,7 +11,7 @@ from src.modules.instance_manager import (
 from src.utils.logger import get_module_logger
 from src.utils.database_model import DB_Service, DB_Instance
 from datetime import datetime
-from src.utils.database import engine  # SQLModel 引擎
+from src.utils.database import engine, upsert_services  # SQLModel 引擎
 from sqlmodel import Session, select  # SQLModel Session - 添加 select
 from winpty import PtyProcess  # type: ignore
 from pathlib import Path
@@ -779,16 +779,20 @@ async def add_existing_instance(payload: DeployRequest):
                     status_code=500, detail="实例信息保存失败，请查看日志了解详情。"
                 )
             # 创建服务记录
-            for service_config in payload.install_services:
-                db_service = DB_Service(
-                    instance_id=instance_id_str,
-                    name=service_config.name,
-                    path=service_config.path,
-                    status="stopped",  # 新添加的服务默认为停止状态
-                    port=service_config.port,
-                    run_cmd=service_config.run_cmd,  # 使用payload中的run_cmd字段
-                )
-                session.add(db_service)
+            upsert_services(
+                session,
+                [
+                    {
+                        "instance_id": instance_id_str,
+                        "name": service_config.name,
+                        "path": service_config.path,
+                        "status": "stopped",  # 新添加的服务默认为停止状态
+                        "port": service_config.port,
+                        "run_cmd": service_config.run_cmd,  # 使用payload中的run_cmd字段
+                    }
+                    for service_config in payload.install_services
+                ],
+            )
 
             session.commit()
             logger.info(
@@ -3,7 +3,7 @@ from fastapi import WebSocket
 from starlette.websockets import WebSocketState, WebSocketDisconnect
 from winpty import PtyProcess  # type: ignore
 import json
-from typing import Dict, Any, Tuple, Optional
+from typing import Dict, Any, List, Tuple, Optional
 import logging
 import time
 import os
@@ -31,20 +31,80 @@ def get_log_file_path(session_id: str) -> str:
     return os.path.join(LOG_DIR, f"{session_id}.txt")
 
 
+# 日志写入队列：PTY 输出先入队，由后台任务批量追加到文件，避免每个输出块都单独打开文件
+LOG_QUEUE_MAXSIZE = 10000
+LOG_BATCH_SIZE = 128
+LOG_BATCH_WAIT = 0.05  # 凑批等待时间（秒）
+LOG_FLUSH_TIMEOUT = 1.0  # 读取历史日志前等待队列写完的最长时间（秒）
+
+_log_queue: Optional[asyncio.Queue] = None
+_log_writer_task: Optional[asyncio.Task] = None
+
+
+def _write_log_batch(batch: List[Tuple[str, str]]):
+    """将一批 (session_id, 日志条目) 按会话分组，每个会话的日志文件只打开一次"""
+    grouped: Dict[str, List[str]] = {}
+    for session_id, log_entry in batch:
+        grouped.setdefault(session_id, []).append(log_entry)
+
+    for session_id, entries in grouped.items():
+        try:
+            with open(get_log_file_path(session_id), "a", encoding="utf-8") as f:
+                f.write("".join(entries))
+        except Exception as e:
+            logger.error(f"存储日志到文件时出错 (会话 {session_id}): {e}")
+
+
+async def _log_writer_loop(queue: asyncio.Queue):
+    """后台任务：从队列中凑批取出日志，在线程中一次性写入文件"""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await queue.get()]
+        deadline = loop.time() + LOG_BATCH_WAIT
+        while len(batch) < LOG_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        try:
+            await asyncio.to_thread(_write_log_batch, batch)
+        except Exception as e:
+            logger.error(f"批量写入日志文件时出错: {e}")
+        finally:
+            for _ in batch:
+                queue.task_done()
+
+
+def _get_log_queue() -> asyncio.Queue:
+    """获取日志队列，并确保后台写入任务正在运行"""
+    global _log_queue, _log_writer_task
+    if _log_queue is None:
+        _log_queue = asyncio.Queue(maxsize=LOG_QUEUE_MAXSIZE)
+    if _log_writer_task is None or _log_writer_task.done():
+        _log_writer_task = asyncio.create_task(_log_writer_loop(_log_queue))
+    return _log_queue
+
+
+async def flush_log_queue(timeout: float = LOG_FLUSH_TIMEOUT):
+    """等待已入队的日志写入文件，超时后直接返回"""
+    if _log_queue is None:
+        return
+    try:
+        await asyncio.wait_for(_log_queue.join(), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"等待日志写入超时 ({timeout} 秒)，剩余 {_log_queue.qsize()} 条")
+
+
 async def store_log_to_file(session_id: str, data: str):
-    """将日志数据存储到文件"""
+    """将日志数据加入写入队列，由后台任务批量存储到文件；队列已满时等待"""
     try:
         timestamp = int(time.time() * 1000)
         log_entry = f"{timestamp}:{data}"
-
-        log_file_path = get_log_file_path(session_id)
-
-        # 异步写入文件
-        def write_log():
-            with open(log_file_path, "a", encoding="utf-8") as f:
-                f.write(log_entry)
-
-        await asyncio.to_thread(write_log)
+        await _get_log_queue().put((session_id, log_entry))
 
     except Exception as e:
         logger.error(f"存储日志到文件时出错 (会话 {session_id}): {e}")
@@ -64,6 +124,9 @@ async def send_history_logs(
     if websocket.client_state != WebSocketState.CONNECTED:
         return
 
+    # 先让已入队的日志落盘，保证历史日志包含最新输出
+    await flush_log_queue()
+
     log_file_path = get_log_file_path(session_id)
     if not os.path.exists(log_file_path):
         logger.info(f"会话 {session_id} 的日志文件不存在，跳过历史日志发送")
@@ -772,6 +835,7 @@ async def shutdown_all_websocket_connections():
 
     if not sessions_to_close:
         logger.info("没有活跃的 WebSocket 连接需要关闭。")
+        await flush_log_queue()
         return
 
     logger.info(f"找到 {len(sessions_to_close)} 个活跃的 WebSocket 连接，正在关闭...")
@@ -794,6 +858,9 @@ async def shutdown_all_websocket_connections():
     except Exception as e:
         logger.error(f"关闭 WebSocket 连接时发生错误: {e}")
 
+    # 将尚未落盘的 PTY 日志写入文件
+    await flush_log_queue()
+
 
 async def _close_single_session(session_id: str):
     """
@@ -3,17 +3,155 @@ import shutil
 import subprocess
 from pathlib import Path
 from src.utils.logger import get_module_logger
+from src.utils.config import global_config
 import stat  # For file permissions
 import sys  # 添加sys导入，用于虚拟环境创建
 import re  # 添加正则表达式支持，用于配置文件修改
 import hashlib  # 添加hashlib导入，用于生成确认文件哈希
-# import errno # For error codes
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from functools import lru_cache
+from urllib.parse import urlparse
+import errno  # 用于判断文件复制的回退错误码
+import psutil  # 终止安装进程及其子进程
+
+if os.name == "nt":
+    import msvcrt  # 镜像锁文件
+else:
+    import fcntl  # 镜像锁文件
 
 # Import List for type hinting
-from typing import List, Dict, Any, Callable, Optional
+from typing import List, Dict, Any, Callable, Optional, Tuple
 
 logger = get_module_logger("版本部署工具")
 
+# 平台相关常量，在模块加载时计算一次
+_IS_WINDOWS = os.name == "nt"
+_CREATE_NO_WINDOW = subprocess.CREATE_NO_WINDOW if _IS_WINDOWS else 0
+_PY_EXECUTABLE = sys.executable
+
+# 部署过程使用的本地缓存根目录
+_CACHE_ROOT = Path.home() / ".cache" / "mailauncher"
+# 本地 Git 镜像缓存目录：每个远程仓库保留一份裸镜像，部署时从镜像本地浅克隆
+# （需在配置中启用 git_mirror_enabled）
+_GIT_MIRROR_ROOT = _CACHE_ROOT / "mirror"
+# 本地 Git 镜像操作（首次完整镜像、增量拉取、等待其他部署释放镜像锁）的超时时间（秒）。
+# 首次完整镜像比浅克隆慢得多，超时后直接从远程浅克隆
+_GIT_MIRROR_TIMEOUT = 120
+# 首次完整镜像失败或超时后，在此时间内（秒）不再尝试创建该镜像，避免慢速网络下每次部署都重复等待
+_GIT_MIRROR_RETRY_INTERVAL = 7 * 24 * 3600
+# 超过此时间（秒）未被使用的镜像会被清理
+_GIT_MIRROR_MAX_AGE = 30 * 24 * 3600
+# 可取消的操作（子进程、等待镜像锁）检查取消标记的间隔（秒）
+_CANCEL_POLL_INTERVAL = 0.2
+# pip / uv 的下载与构建缓存，在所有实例和服务的依赖安装之间共享
+_PIP_CACHE_DIR = _CACHE_ROOT / "pip"
+_UV_CACHE_DIR = _CACHE_ROOT / "uv"
+
+# 部署前要求部署目录所在磁盘至少剩余的空间（主程序、服务代码及其虚拟环境）
+_MIN_FREE_DISK_BYTES = 1024 * 1024 * 1024
+
+# 依赖安装的总超时时间，以及无任何输出时判定为卡死的空闲超时时间（秒）
+_INSTALL_TOTAL_TIMEOUT = 900
+_INSTALL_IDLE_TIMEOUT = 300
+
+# 配置文件修改使用的正则，在模块加载时编译一次
+# 直接作用于 .env 文件的字节内容；只匹配行首的 PORT 键，WEBUI_PORT 等其他端口配置不受影响；
+# 空白只匹配空格和制表符，避免跨行匹配
+_ENV_PORT_RE = re.compile(rb"(?m)^PORT[ \t]*=[ \t]*\d+")
+
+# _fast_copy 回退到用户态复制时使用的缓冲区大小，以及触发回退的错误码
+_COPY_BUFFER_SIZE = 1024 * 1024
+_COPY_FALLBACK_ERRNOS = frozenset(
+    {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF}
+)
+
+
+@contextmanager
+def _file_lock(
+    lock_path: Path, timeout: float, cancel_event: Optional[threading.Event] = None
+):
+    """
+    基于锁文件的独占锁，同时在进程之间和同一进程的线程之间生效。
+    锁由操作系统持有，进程异常退出后自动释放，不会留下失效的锁。
+
+    Raises:
+        TimeoutError: 在 timeout 秒内未能获取锁
+        InterruptedError: 等待期间 cancel_event 被置位
+    """
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                if _IS_WINDOWS:
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                else:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except OSError:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise InterruptedError(f"等待锁 {lock_path} 时被取消")
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"等待锁 {lock_path} 超时")
+                time.sleep(_CANCEL_POLL_INTERVAL)
+        try:
+            yield
+        finally:
+            if _IS_WINDOWS:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+def _run_cancellable(
+    command: List[str],
+    timeout: float,
+    cancel_event: Optional[threading.Event] = None,
+) -> Optional[subprocess.CompletedProcess]:
+    """
+    运行命令并捕获文本输出，行为与 subprocess.run(capture_output=True, text=True) 相同，
+    但 cancel_event 被置位时会终止并回收子进程，返回 None。
+
+    Raises:
+        subprocess.TimeoutExpired: 超时（子进程已被终止并回收）
+    """
+    if cancel_event is not None and cancel_event.is_set():
+        return None
+    process = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors="replace",
+        creationflags=_CREATE_NO_WINDOW,
+    )
+    # 没有取消标记时无需轮询，直接等待到超时
+    poll_interval = _CANCEL_POLL_INTERVAL if cancel_event is not None else timeout
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            stdout, stderr = process.communicate(timeout=poll_interval)
+            return subprocess.CompletedProcess(
+                command, process.returncode, stdout, stderr
+            )
+        except subprocess.TimeoutExpired:
+            cancelled = cancel_event is not None and cancel_event.is_set()
+            if cancelled or time.monotonic() >= deadline:
+                process.kill()
+                process.communicate()
+                if cancelled:
+                    return None
+                raise subprocess.TimeoutExpired(command, timeout)
+
+
 # 声明全局日志回调函数变量
 _log_callback: Optional[Callable[[str, str, str], None]] = None
 
@@ -38,160 +176,231 @@ def _add_log(instance_id: str, message: str, level: str = "info"):
         _log_callback(instance_id, message, level)
 
 
-def get_python_executable() -> str:
+# PyInstaller环境中尝试的Python解释器候选（命令名或绝对路径）
+_PYTHON_CANDIDATES = [
+    # Python Launcher
+    "py",
+    "python",
+    "python3",
+    # 常见安装路径
+    r"C:\Python312\python.exe",
+    r"C:\Python311\python.exe",
+    r"C:\Python310\python.exe",
+    r"C:\Python39\python.exe",
+    r"C:\Python38\python.exe",
+    # AppData Local 路径
+    os.path.expanduser(r"~\AppData\Local\Programs\Python\Python312\python.exe"),
+    os.path.expanduser(r"~\AppData\Local\Programs\Python\Python311\python.exe"),
+    os.path.expanduser(r"~\AppData\Local\Programs\Python\Python310\python.exe"),
+    # Program Files 路径
+    r"C:\Program Files\Python312\python.exe",
+    r"C:\Program Files\Python311\python.exe",
+    r"C:\Program Files\Python310\python.exe",
+]
+
+# PyInstaller环境中尝试的Git候选（命令名或绝对路径）
+_GIT_CANDIDATES = [
+    "git",  # 系统PATH中的git
+    r"C:\Program Files\Git\bin\git.exe",
+    r"C:\Program Files (x86)\Git\bin\git.exe",
+    r"C:\Git\bin\git.exe",
+    # 便携版Git路径
+    r"C:\PortableGit\bin\git.exe",
+]
+
+
+def _find_executable(candidates: List[str], display_name: str) -> str:
     """
-    获取正确的Python解释器路径，处理PyInstaller打包环境。
+    在PyInstaller环境中按顺序探测可用的可执行文件。
+
+    命令名通过 shutil.which 在 PATH 中解析，绝对路径先检查是否存在，
+    只对确实存在的可执行文件启动一次 `--version` 子进程校验。
+
+    Args:
+        candidates: 候选命令名或绝对路径
+        display_name: 用于日志和错误信息的名称，例如 "Python解释器"
 
     Returns:
-        str: Python解释器的路径
+        str: 第一个可用的可执行文件路径
+
+    Raises:
+        RuntimeError: 没有任何候选可用时抛出
     """
-    # 检测是否在PyInstaller打包的环境中运行
-    if getattr(sys, "frozen", False) and hasattr(sys, "_MEIPASS"):
-        logger.info("检测到PyInstaller环境，寻找系统Python解释器...")
-
-        # 尝试常见的Python安装路径
-        potential_paths = [
-            # Python Launcher
-            "py",
-            "python",
-            "python3",
-            # 常见安装路径
-            r"C:\Python312\python.exe",
-            r"C:\Python311\python.exe",
-            r"C:\Python310\python.exe",
-            r"C:\Python39\python.exe",
-            r"C:\Python38\python.exe",
-            # AppData Local 路径
-            os.path.expanduser(r"~\AppData\Local\Programs\Python\Python312\python.exe"),
-            os.path.expanduser(r"~\AppData\Local\Programs\Python\Python311\python.exe"),
-            os.path.expanduser(r"~\AppData\Local\Programs\Python\Python310\python.exe"),
-            # Program Files 路径
-            r"C:\Program Files\Python312\python.exe",
-            r"C:\Program Files\Python311\python.exe",
-            r"C:\Program Files\Python310\python.exe",
-        ]
+    logger.info(f"检测到PyInstaller环境，寻找系统{display_name}...")
 
-        for python_path in potential_paths:
-            try:
-                # 测试Python解释器是否可用
-                result = subprocess.run(
-                    [python_path, "--version"],
-                    capture_output=True,
-                    text=True,
-                    timeout=10,
-                    creationflags=subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0,
-                )
-                if result.returncode == 0:
-                    logger.info(f"找到可用的Python解释器: {python_path}")
-                    logger.info(f"Python版本: {result.stdout.strip()}")
-                    return python_path
-            except (FileNotFoundError, subprocess.TimeoutExpired, OSError):
+    for candidate in candidates:
+        if os.path.isabs(candidate):
+            if not os.path.exists(candidate):
+                continue
+            executable = candidate
+        else:
+            executable = shutil.which(candidate)
+            if executable is None:
                 continue
-
-        # 如果都不行，尝试使用whereis或where命令查找
         try:
-            if os.name == "nt":
-                result = subprocess.run(
-                    ["where", "python"],
-                    capture_output=True,
-                    text=True,
-                    timeout=10,
-                    creationflags=subprocess.CREATE_NO_WINDOW,
-                )
-            else:
-                result = subprocess.run(
-                    ["which", "python3"],
-                    capture_output=True,
-                    text=True,
-                    timeout=10,
-                )
-
+            result = subprocess.run(
+                [executable, "--version"],
+                capture_output=True,
+                text=True,
+                timeout=10,
+                creationflags=_CREATE_NO_WINDOW,
+            )
             if result.returncode == 0:
-                python_path = result.stdout.strip().split("\n")[0]
-                logger.info(f"通过系统命令找到Python解释器: {python_path}")
-                return python_path
+                logger.info(f"找到可用的{display_name}: {executable}")
+                logger.info(f"版本: {result.stdout.strip()}")
+                return executable
         except (FileNotFoundError, subprocess.TimeoutExpired, OSError):
-            pass
+            continue
+
+    logger.error(f"在PyInstaller环境中未能找到可用的{display_name}")
+    raise RuntimeError(
+        f"未能找到可用的{display_name}。请确保其已正确安装并添加到系统PATH。"
+    )
+
+
+def _is_pyinstaller_bundle() -> bool:
+    """检测是否在PyInstaller打包的环境中运行"""
+    return getattr(sys, "frozen", False) and hasattr(sys, "_MEIPASS")
 
-        logger.error("在PyInstaller环境中未能找到可用的Python解释器")
-        raise RuntimeError(
-            "未能找到可用的Python解释器。请确保Python已正确安装并添加到系统PATH。"
-        )
-    else:
-        # 非PyInstaller环境，使用sys.executable
-        logger.info(f"使用当前Python解释器: {sys.executable}")
-        return sys.executable
+
+@lru_cache(maxsize=1)
+def get_python_executable() -> str:
+    """
+    获取正确的Python解释器路径，处理PyInstaller打包环境。
+    结果会被缓存，避免每次部署都重新探测；探测失败抛出的异常不会被缓存。
+
+    Returns:
+        str: Python解释器的路径
+    """
+    if _is_pyinstaller_bundle():
+        return _find_executable(_PYTHON_CANDIDATES, "Python解释器")
+    # 非PyInstaller环境，使用sys.executable
+    logger.info(f"使用当前Python解释器: {_PY_EXECUTABLE}")
+    return _PY_EXECUTABLE
 
 
+@lru_cache(maxsize=1)
 def get_git_executable() -> str:
     """
     获取正确的Git可执行文件路径，处理PyInstaller打包环境。
+    结果会被缓存，避免每次克隆都重新探测；探测失败抛出的异常不会被缓存。
 
     Returns:
         str: Git可执行文件的路径
     """
-    # 检测是否在PyInstaller打包的环境中运行
-    if getattr(sys, "frozen", False) and hasattr(sys, "_MEIPASS"):
-        logger.info("检测到PyInstaller环境，寻找系统Git...")
-
-        # 尝试常见的Git安装路径
-        potential_paths = [
-            "git",  # 系统PATH中的git
-            r"C:\Program Files\Git\bin\git.exe",
-            r"C:\Program Files (x86)\Git\bin\git.exe",
-            r"C:\Git\bin\git.exe",
-            # 便携版Git路径
-            r"C:\PortableGit\bin\git.exe",
-        ]
+    if _is_pyinstaller_bundle():
+        return _find_executable(_GIT_CANDIDATES, "Git")
+    # 非PyInstaller环境，直接使用git命令
+    logger.info("使用系统Git命令")
+    return "git"
 
-        for git_path in potential_paths:
-            try:
-                # 测试Git是否可用
-                result = subprocess.run(
-                    [git_path, "--version"],
-                    capture_output=True,
-                    text=True,
-                    timeout=10,
-                    creationflags=subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0,
-                )
-                if result.returncode == 0:
-                    logger.info(f"找到可用的Git: {git_path}")
-                    logger.info(f"Git版本: {result.stdout.strip()}")
-                    return git_path
-            except (FileNotFoundError, subprocess.TimeoutExpired, OSError):
-                continue
 
-        # 尝试使用where命令查找
-        try:
-            if os.name == "nt":
-                result = subprocess.run(
-                    ["where", "git"],
-                    capture_output=True,
-                    text=True,
-                    timeout=10,
-                    creationflags=subprocess.CREATE_NO_WINDOW,
-                )
-            else:
-                result = subprocess.run(
-                    ["which", "git"],
-                    capture_output=True,
-                    text=True,
-                    timeout=10,
-                )
+@lru_cache(maxsize=32)
+def _compile_section_key_re(key: str) -> re.Pattern:
+    """
+    获取同时匹配 TOML 节标题与行首 `key = 数字` 配置项的已编译联合正则，
+    按键名缓存，避免重复部署时反复编译。
 
-            if result.returncode == 0:
-                git_path = result.stdout.strip().split("\n")[0]
-                logger.info(f"通过系统命令找到Git: {git_path}")
-                return git_path
-        except (FileNotFoundError, subprocess.TimeoutExpired, OSError):
-            pass
+    Args:
+        key: 配置项键名
+
+    Returns:
+        re.Pattern: 命名分组 `section` 为节名，`prefix` 为 `key = ` 前缀
+    """
+    return re.compile(
+        rf"^\[(?P<section>[^\]\n]*)\]|^(?P<prefix>{re.escape(key)}\s*=\s*)\d+",
+        re.MULTILINE,
+    )
+
+
+def _rewrite_file_lines(file_path: Path, replace_line: Callable[[str], str]) -> bool:
+    """
+    逐行流式改写文本文件：替换后的内容先写入同目录临时文件，再通过 os.replace 原子替换原文件。
+
+    Args:
+        file_path: 要改写的文件路径
+        replace_line: 接收原始行并返回新行的函数
+
+    Returns:
+        bool: 有行被修改并已替换原文件返回True，内容无变化返回False
+    """
+    tmp_path = file_path.with_name(file_path.name + ".tmp")
+    changed = False
+    try:
+        with (
+            open(file_path, "r", encoding="utf-8", newline="") as fin,
+            open(tmp_path, "w", encoding="utf-8", newline="") as fout,
+        ):
+            for line in fin:
+                new_line = replace_line(line)
+                if new_line != line:
+                    changed = True
+                fout.write(new_line)
+        if changed:
+            os.replace(tmp_path, file_path)
+        return changed
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def _write_file_atomic(file_path: Path, content: bytes) -> None:
+    """
+    先写入同目录临时文件，再通过 os.replace 原子替换原文件。
+
+    Args:
+        file_path: 要写入的文件路径
+        content: 文件的完整新内容
+    """
+    tmp_path = file_path.with_name(file_path.name + ".tmp")
+    try:
+        tmp_path.write_bytes(content)
+        os.replace(tmp_path, file_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def _fast_copy(src: Path, dst: Path) -> None:
+    """
+    复制文件内容（不含元数据）。
 
-        logger.error("在PyInstaller环境中未能找到可用的Git")
-        raise RuntimeError("未能找到可用的Git。请确保Git已正确安装并添加到系统PATH。")
-    else:
-        # 非PyInstaller环境，直接使用git命令
-        logger.info("使用系统Git命令")
-        return "git"
+    优先使用 os.copy_file_range 在内核内完成复制，在 btrfs/xfs/NFS 等文件系统上可直接克隆数据块；
+    平台不支持或跨文件系统时，回退为复用 1 MiB 缓冲区的 readinto 循环。
+
+    Args:
+        src: 源文件路径
+        dst: 目标文件路径，已存在时会被覆盖
+
+    Raises:
+        OSError: 源文件不存在或读写失败时抛出
+    """
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        if hasattr(os, "copy_file_range"):
+            try:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+                else:
+                    return
+            except OSError as e:
+                if e.errno not in _COPY_FALLBACK_ERRNOS:
+                    raise
+            # 回退前重置双方偏移，丢弃已部分写入的内容
+            fsrc.seek(0)
+            fdst.seek(0)
+            fdst.truncate()
+
+        buffer = bytearray(_COPY_BUFFER_SIZE)
+        view = memoryview(buffer)
+        while True:
+            n = fsrc.readinto(buffer)
+            if not n:
+                break
+            fdst.write(view[:n])
 
 
 def modify_env_file(env_file_path: Path, instance_port: str, instance_id: str) -> bool:
@@ -209,25 +418,21 @@ def modify_env_file(env_file_path: Path, instance_port: str, instance_id: str) -
     logger.info(f"开始修改 .env 文件端口配置 (实例ID: {instance_id})")
 
     try:
-        if not env_file_path.exists():
+        try:
+            content = env_file_path.read_bytes()
+        except FileNotFoundError:
             logger.error(f".env 文件不存在: {env_file_path} (实例ID: {instance_id})")
             return False
 
-        # 读取原文件内容
-        with open(env_file_path, "r", encoding="utf-8") as f:
-            content = f.read()
-
-        # 使用正则表达式替换 PORT 配置
-        pattern = r"PORT\s*=\s*\d+"
-        replacement = f"PORT={instance_port}"
-
-        if re.search(pattern, content):
-            new_content = re.sub(pattern, replacement, content)
-
-            # 写回文件
-            with open(env_file_path, "w", encoding="utf-8") as f:
-                f.write(new_content)
+        # 整个文件一次正则替换行首的 PORT 配置（兼容 `PORT = 1234` 等带空白的写法）
+        new_content, count = _ENV_PORT_RE.subn(
+            f"PORT={instance_port}".encode(), content
+        )
+        port_found = count > 0
+        if port_found and new_content != content:
+            _write_file_atomic(env_file_path, new_content)
 
+        if port_found:
             logger.info(
                 f"成功修改 .env 文件端口为 {instance_port} (实例ID: {instance_id})"
             )
@@ -265,23 +470,31 @@ def modify_napcat_config_file(
             )
             return False
 
-        # 读取原文件内容
-        with open(config_file_path, "r", encoding="utf-8") as f:
-            content = f.read()
-
-        # 替换 Napcat_Server 的 port
-        napcat_pattern = r"(\[Napcat_Server\].*?port\s*=\s*)\d+"
-        napcat_replacement = rf"\g<1>{napcat_port}"
-        content = re.sub(napcat_pattern, napcat_replacement, content, flags=re.DOTALL)
-
-        # 替换 MaiBot_Server 的 port
-        maibot_pattern = r"(\[MaiBot_Server\].*?port\s*=\s*)\d+"
-        maibot_replacement = rf"\g<1>{maibot_port}"
-        content = re.sub(
-            maibot_pattern, maibot_replacement, content, flags=re.DOTALL
-        )  # 写回文件
-        with open(config_file_path, "w", encoding="utf-8") as f:
-            f.write(content)
+        # 逐行扫描：联合正则依次命中节标题和 port 行，记录当前所在节，
+        # 只替换目标节中的第一个 port
+        section_ports = {
+            "Napcat_Server": napcat_port,
+            "MaiBot_Server": maibot_port,
+        }
+        section_key_re = _compile_section_key_re("port")
+        current_section: Optional[str] = None
+        replaced_sections = set()
+
+        def _replace(line: str) -> str:
+            nonlocal current_section
+            match = section_key_re.match(line)
+            if match is None:
+                return line
+            if match.group("section") is not None:
+                current_section = match.group("section").strip()
+                return line
+            port = section_ports.get(current_section)
+            if port is None or current_section in replaced_sections:
+                return line
+            replaced_sections.add(current_section)
+            return f"{match.group('prefix')}{port}{line[match.end() :]}"
+
+        _rewrite_file_lines(config_file_path, _replace)
 
         logger.info(
             f"成功修改 napcat-ada config.toml 文件: Napcat端口={napcat_port}, MaiBot端口={maibot_port} (实例ID: {instance_id})"
@@ -295,6 +508,24 @@ def modify_napcat_config_file(
         return False
 
 
+def _md5_text_file(file_path: Path) -> str:
+    """
+    计算文本文件的MD5，结果与以文本模式读取后再 encode("utf-8") 计算的哈希一致，
+    但省去了解码再编码的往返和额外的字符串副本。
+
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        str: 十六进制MD5摘要
+    """
+    data = file_path.read_bytes()
+    if b"\r" in data:
+        # 与文本模式的通用换行符转换保持一致
+        data = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+    return hashlib.md5(data).hexdigest()
+
+
 def create_agreement_confirmation_files(deploy_path: Path, instance_id: str) -> bool:
     """
     在主程序根目录创建确认文件来自动同意用户协议和隐私政策。
@@ -316,9 +547,7 @@ def create_agreement_confirmation_files(deploy_path: Path, instance_id: str) ->
 
         # 检查EULA文件是否存在并计算哈希值
         if eula_file.exists():
-            with open(eula_file, "r", encoding="utf-8") as f:
-                eula_content = f.read()
-            eula_hash = hashlib.md5(eula_content.encode("utf-8")).hexdigest()
+            eula_hash = _md5_text_file(eula_file)
 
             # 创建EULA确认文件
             eula_confirm_file.write_text(eula_hash, encoding="utf-8")
@@ -332,9 +561,7 @@ def create_agreement_confirmation_files(deploy_path: Path, instance_id: str) ->
 
         # 检查隐私政策文件是否存在并计算哈希值
         if privacy_file.exists():
-            with open(privacy_file, "r", encoding="utf-8") as f:
-                privacy_content = f.read()
-            privacy_hash = hashlib.md5(privacy_content.encode("utf-8")).hexdigest()
+            privacy_hash = _md5_text_file(privacy_file)
 
             # 创建隐私政策确认文件
             privacy_confirm_file.write_text(privacy_hash, encoding="utf-8")
@@ -354,27 +581,106 @@ def create_agreement_confirmation_files(deploy_path: Path, instance_id: str) ->
         return False
 
 
+def _kill_process_tree(process: subprocess.Popen) -> None:
+    """
+    终止进程及其所有子进程。pip 启动的构建子进程会继承输出管道，
+    只终止 pip 本身时管道不会关闭，读取输出的循环会一直阻塞。
+    """
+    try:
+        children = psutil.Process(process.pid).children(recursive=True)
+    except psutil.Error:
+        children = []
+    process.kill()
+    for child in children:
+        try:
+            child.kill()
+        except psutil.Error:
+            pass
+
+
+def _run_install_streaming(
+    cmd: List[str], cwd: Path, env: Dict[str, str], instance_id: str
+) -> Tuple[Optional[int], List[str]]:
+    """
+    运行依赖安装命令，并将输出逐行转发到部署日志。
+    超过总超时时间，或超过空闲超时时间没有任何新输出时终止进程。
+
+    Args:
+        cmd: 要执行的命令
+        cwd: 工作目录
+        env: 环境变量
+        instance_id: 实例ID
+
+    Returns:
+        Tuple[Optional[int], List[str]]: (返回码，超时被终止时为None；最后若干行输出)
+    """
+    process = subprocess.Popen(
+        cmd,
+        cwd=str(cwd),
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        bufsize=1,
+        creationflags=_CREATE_NO_WINDOW,
+    )
+    start_time = last_output_time = time.monotonic()
+    finished = threading.Event()
+    timed_out = threading.Event()
+
+    def _watchdog():
+        while not finished.wait(5):
+            now = time.monotonic()
+            if (
+                now - last_output_time > _INSTALL_IDLE_TIMEOUT
+                or now - start_time > _INSTALL_TOTAL_TIMEOUT
+            ):
+                timed_out.set()
+                _kill_process_tree(process)
+                return
+
+    threading.Thread(target=_watchdog, daemon=True).start()
+
+    output_tail = deque(maxlen=50)
+    try:
+        for line in process.stdout:
+            last_output_time = time.monotonic()
+            line = line.rstrip()
+            if line:
+                output_tail.append(line)
+                _add_log(instance_id, line, "info")
+        process.wait()
+    finally:
+        finished.set()
+        process.stdout.close()
+
+    if timed_out.is_set():
+        return None, list(output_tail)
+    return process.returncode, list(output_tail)
+
+
 def setup_service_virtual_environment(
-    service_path: str, service_name: str, instance_id: str
+    service_dir: Path, service_name: str, instance_id: str
 ) -> bool:
     """
     在指定的服务目录中设置虚拟环境并安装依赖。
 
     Args:
-        service_path: 服务目录路径
+        service_dir: 已解析为绝对路径的服务目录
         service_name: 服务名称
         instance_id: 实例ID
 
     Returns:
         bool: 设置成功返回True，失败返回False"""
     logger.info(
-        f"开始为服务 {service_name} (实例ID: {instance_id}) 在 {service_path} 设置虚拟环境..."
+        f"开始为服务 {service_name} (实例ID: {instance_id}) 在 {service_dir} 设置虚拟环境..."
     )
     _add_log(instance_id, f"🔧 开始设置 {service_name} 虚拟环境", "info")
 
     try:
         # 将工作目录切换到服务目录
-        service_dir = Path(service_path).resolve()
         if not service_dir.exists():
             logger.error(
                 f"服务目录 {service_dir} 不存在 (服务: {service_name}, 实例ID: {instance_id})"
@@ -406,24 +712,38 @@ def setup_service_virtual_environment(
         logger.info(
             f"使用Python解释器: {python_executable} (服务: {service_name}, 实例ID: {instance_id})"
         )
-        create_venv_cmd = [python_executable, "-m", "venv", str(venv_path)]
+        # 使用 uv 安装依赖时虚拟环境内不需要 pip，跳过耗时的 pip 引导安装
+        uv_executable = shutil.which("uv")
+        if uv_executable:
+            create_venv_cmd = [
+                python_executable,
+                "-m",
+                "venv",
+                "--without-pip",
+                str(venv_path),
+            ]
+        else:
+            create_venv_cmd = [python_executable, "-m", "venv", str(venv_path)]
 
+        # 只保留 stderr，stdout 直接丢弃，避免无意义的输出解码
         result = subprocess.run(
             create_venv_cmd,
             cwd=str(service_dir),
-            capture_output=True,
-            text=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            check=False,
             timeout=300,
-            creationflags=subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0,
+            creationflags=_CREATE_NO_WINDOW,
         )
 
         if result.returncode != 0:
+            stderr_text = result.stderr.decode("utf-8", errors="replace")
             logger.error(
-                f"创建虚拟环境失败 (服务: {service_name}, 实例ID: {instance_id}): {result.stderr}"
+                f"创建虚拟环境失败 (服务: {service_name}, 实例ID: {instance_id}): {stderr_text}"
             )
             _add_log(
                 instance_id,
-                f"❌ 虚拟环境创建失败: {result.stderr or '未知错误'}",
+                f"❌ 虚拟环境创建失败: {stderr_text or '未知错误'}",
                 "error",
             )
             return False
@@ -443,7 +763,7 @@ def setup_service_virtual_environment(
         logger.info(f"开始安装依赖 (服务: {service_name}, 实例ID: {instance_id})")
 
         # 在Windows系统中，虚拟环境的Python和pip路径
-        if os.name == "nt":
+        if _IS_WINDOWS:
             venv_python_executable = venv_path / "Scripts" / "python.exe"
             venv_pip_executable = venv_path / "Scripts" / "pip.exe"
         else:
@@ -459,81 +779,112 @@ def setup_service_virtual_environment(
 
         logger.info(
             f"使用虚拟环境Python: {venv_python_executable} (服务: {service_name}, 实例ID: {instance_id})"
-        )  # 升级pip
-        logger.info(f"升级pip (服务: {service_name}, 实例ID: {instance_id})")
-        upgrade_pip_cmd = [
-            str(venv_python_executable),
-            "-m",
-            "pip",
-            "install",
-            "--upgrade",
-            "pip",
-            "-i",
-            "https://mirrors.aliyun.com/pypi/simple/",
-            "--trusted-host",
-            "mirrors.aliyun.com",
-        ]
-
-        result = subprocess.run(
-            upgrade_pip_cmd,
-            cwd=str(service_dir),
-            capture_output=True,
-            text=True,
-            timeout=300,
-            creationflags=subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0,
         )
 
-        if result.returncode != 0:
-            logger.warning(
-                f"升级pip失败 (服务: {service_name}, 实例ID: {instance_id}): {result.stderr}"
+        # 依赖安装共享同一份包缓存，后续服务可直接复用已下载/构建的 wheel；
+        # 用户自行配置的缓存目录优先
+        install_env = os.environ.copy()
+        install_env.setdefault("PIP_CACHE_DIR", str(_PIP_CACHE_DIR))
+        install_env.setdefault("UV_CACHE_DIR", str(_UV_CACHE_DIR))
+
+        # 优先使用 uv 安装依赖（并行下载、全局缓存），不可用时回退到 pip
+        if uv_executable:
+            logger.info(
+                f"使用 uv 安装依赖: {uv_executable} (服务: {service_name}, 实例ID: {instance_id})"
             )
-            _add_log(instance_id, "⚠️ pip升级失败，但继续安装依赖", "warning")
+            install_deps_cmd = [
+                uv_executable,
+                "pip",
+                "install",
+                "--python",
+                str(venv_python_executable),
+                "-r",
+                str(requirements_file),
+                "--index-url",
+                "https://mirrors.aliyun.com/pypi/simple/",
+            ]
         else:
-            logger.info(f"pip升级成功 (服务: {service_name}, 实例ID: {instance_id})")
-            _add_log(instance_id, "✅ pip升级成功", "success")
-
-        # 安装requirements.txt中的依赖
-        _add_log(instance_id, f"📦 开始安装 {service_name} 依赖包", "info")
-        install_deps_cmd = [
-            str(venv_pip_executable),
-            "install",
-            "-r",
-            str(requirements_file),
-            "-i",
-            "https://mirrors.aliyun.com/pypi/simple/",
-            "--trusted-host",
-            "mirrors.aliyun.com",
-        ]
-
-        logger.info(
-            f"执行依赖安装命令: {' '.join(install_deps_cmd)} (服务: {service_name}, 实例ID: {instance_id})"
-        )
+            # 升级pip（uv 不依赖虚拟环境中的 pip，无需此步骤）
+            logger.info(f"升级pip (服务: {service_name}, 实例ID: {instance_id})")
+            upgrade_pip_cmd = [
+                str(venv_python_executable),
+                "-m",
+                "pip",
+                "install",
+                "--upgrade",
+                "pip",
+                "-i",
+                "https://mirrors.aliyun.com/pypi/simple/",
+                "--trusted-host",
+                "mirrors.aliyun.com",
+            ]
 
-        try:
             result = subprocess.run(
-                install_deps_cmd,
+                upgrade_pip_cmd,
                 cwd=str(service_dir),
-                capture_output=True,
-                text=True,
-                timeout=900,  # 增加超时时间到15分钟
-                creationflags=subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0,
+                env=install_env,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                check=False,
+                timeout=300,
+                creationflags=_CREATE_NO_WINDOW,
             )
 
             if result.returncode != 0:
-                error_msg = result.stderr if result.stderr else "未知错误"
-                logger.error(
-                    f"依赖安装失败 (服务: {service_name}, 实例ID: {instance_id}): {error_msg}"
+                logger.warning(
+                    f"升级pip失败 (服务: {service_name}, 实例ID: {instance_id}): {result.stderr.decode('utf-8', errors='replace')}"
+                )
+                _add_log(instance_id, "⚠️ pip升级失败，但继续安装依赖", "warning")
+            else:
+                logger.info(
+                    f"pip升级成功 (服务: {service_name}, 实例ID: {instance_id})"
                 )
+                _add_log(instance_id, "✅ pip升级成功", "success")
+
+            install_deps_cmd = [
+                str(venv_pip_executable),
+                "install",
+                "-r",
+                str(requirements_file),
+                "--prefer-binary",  # 优先使用已构建的 wheel，避免从源码包构建
+                "-i",
+                "https://mirrors.aliyun.com/pypi/simple/",
+                "--trusted-host",
+                "mirrors.aliyun.com",
+            ]
 
-                # 记录详细的错误信息用于调试
-                if result.stdout:
-                    logger.error(f"pip stdout: {result.stdout}")
-                if result.stderr:
-                    logger.error(f"pip stderr: {result.stderr}")
+        # 安装requirements.txt中的依赖
+        _add_log(instance_id, f"📦 开始安装 {service_name} 依赖包", "info")
 
-                return False
-        except subprocess.TimeoutExpired:
+        # 完整命令仅作诊断用途，使用 lazy 模式在 DEBUG 级别启用时才拼接
+        logger.opt(lazy=True).debug(
+            "执行依赖安装命令: {} (服务: {}, 实例ID: {})",
+            lambda: " ".join(install_deps_cmd),
+            lambda: service_name,
+            lambda: instance_id,
+        )
+
+        # 无缓冲输出，使安装进度可以实时转发到部署日志
+        install_env["PYTHONUNBUFFERED"] = "1"
+        install_env["PYTHONIOENCODING"] = "utf-8"
+        returncode, output_tail = _run_install_streaming(
+            install_deps_cmd, service_dir, install_env, instance_id
+        )
+
+        if returncode is None:
             logger.error(f"依赖安装超时 (服务: {service_name}, 实例ID: {instance_id})")
+            _add_log(
+                instance_id,
+                f"❌ {service_name} 依赖安装超时（超过 {_INSTALL_IDLE_TIMEOUT} 秒无输出"
+                f"或总耗时超过 {_INSTALL_TOTAL_TIMEOUT} 秒），已终止安装",
+                "error",
+            )
+            return False
+        if returncode != 0:
+            error_msg = "\n".join(output_tail) if output_tail else "未知错误"
+            logger.error(
+                f"依赖安装失败 (服务: {service_name}, 实例ID: {instance_id}): {error_msg}"
+            )
             return False
 
         logger.info(f"依赖安装成功 (服务: {service_name}, 实例ID: {instance_id})")
@@ -617,29 +968,20 @@ class DeployManager:
             f"开始部署服务 '{service_name}' 到: {service_deploy_path} (实例ID: {instance_id})"
         )
 
-        # 克隆服务代码
-        cloned_service_successfully = self._run_git_clone(
+        # 克隆服务代码（主仓库与备用仓库同时尝试）
+        cloned_service_successfully = self._run_git_clone_race(
             service_repo_info["primary"],
+            service_repo_info["secondary"],
             service_repo_info["branch"],
             service_deploy_path,
         )
 
-        if not cloned_service_successfully:
-            logger.warning(
-                f"从主仓库克隆 '{service_name}' 服务失败，尝试备用仓库 (实例ID: {instance_id})"
-            )
-            cloned_service_successfully = self._run_git_clone(
-                service_repo_info["secondary"],
-                service_repo_info["branch"],
-                service_deploy_path,
-            )
-
         if not cloned_service_successfully:
             logger.error(
                 f"从主仓库和备用仓库均克隆 '{service_name}' 服务失败 (实例ID: {instance_id})"
             )
             if service_deploy_path.exists():
-                shutil.rmtree(service_deploy_path, ignore_errors=True)
+                self._remove_directory(service_deploy_path)
             return False
 
         logger.info(
@@ -653,35 +995,38 @@ class DeployManager:
         source_service_config = service_template_dir / template_config_name
         destination_service_config = service_deploy_path / final_config_name
 
-        try:
-            if not source_service_config.exists():
-                logger.warning(
-                    f"服务模板配置文件 {source_service_config} 不存在，跳过配置文件复制 (服务: {service_name}, 实例ID: {instance_id})"
-                )
-            else:
-                shutil.copy2(source_service_config, destination_service_config)
+        if not source_service_config.is_file():
+            # 只有模板缺失才跳过；目标路径出错（如父目录不存在）按复制失败处理
+            logger.warning(
+                f"服务模板配置文件 {source_service_config} 不存在，跳过配置文件复制 (服务: {service_name}, 实例ID: {instance_id})"
+            )
+        else:
+            try:
+                # 模板配置无需保留元数据，省去 copystat 的额外系统调用；
+                # 不使用硬链接，否则之后就地修改配置会连带修改仓库中的模板文件
+                _fast_copy(source_service_config, destination_service_config)
                 logger.info(
                     f"成功复制服务配置文件 {source_service_config} 到 {destination_service_config} (实例ID: {instance_id})"
                 )
-        except Exception as e:
-            logger.error(
-                f"复制服务配置文件失败: {e} (服务: {service_name}, 实例ID: {instance_id})"
-            )
-            if service_deploy_path.exists():
-                shutil.rmtree(service_deploy_path, ignore_errors=True)
-            return False
+            except Exception as e:
+                logger.error(
+                    f"复制服务配置文件失败: {e} (服务: {service_name}, 实例ID: {instance_id})"
+                )
+                if service_deploy_path.exists():
+                    self._remove_directory(service_deploy_path)
+                return False
 
         # 设置服务的虚拟环境
         logger.info(f"开始为服务 '{service_name}' 设置虚拟环境 (实例ID: {instance_id})")
         venv_success = setup_service_virtual_environment(
-            str(service_deploy_path), service_name, instance_id
+            service_deploy_path, service_name, instance_id
         )
         if not venv_success:
             logger.error(
                 f"为服务 '{service_name}' 设置虚拟环境失败 (实例ID: {instance_id})"
             )
             if service_deploy_path.exists():
-                shutil.rmtree(service_deploy_path, ignore_errors=True)
+                self._remove_directory(service_deploy_path)
             return False
 
         # 修改服务特定的配置文件
@@ -696,7 +1041,7 @@ class DeployManager:
             if not config_success:
                 logger.error(f"修改 napcat-ada 配置文件失败 (实例ID: {instance_id})")
                 if service_deploy_path.exists():
-                    shutil.rmtree(service_deploy_path, ignore_errors=True)
+                    self._remove_directory(service_deploy_path)
                 return False
 
         logger.info(
@@ -704,14 +1049,154 @@ class DeployManager:
         )
         return True
 
+    def _update_git_mirror(
+        self,
+        git_executable: str,
+        repo_url: str,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> Optional[Path]:
+        """
+        创建或增量更新指定远程仓库的本地裸镜像。
+        首次调用会完整镜像一次，之后每次部署只需拉取增量对象。
+        同一镜像的操作通过锁文件串行执行，并行部署同一仓库时互不干扰。
+        首次完整镜像失败后会记录标记，_GIT_MIRROR_RETRY_INTERVAL 内不再重试创建。
+
+        Args:
+            git_executable: Git可执行文件路径
+            repo_url: 远程仓库URL
+            cancel_event: 置位时中止等待锁或终止正在运行的 git 子进程
+
+        Returns:
+            Optional[Path]: 可用的镜像路径，镜像不可用时返回None
+        """
+        parsed_url = urlparse(repo_url)
+        mirror_name = f"{parsed_url.netloc}{parsed_url.path}".strip("/")
+        mirror_name = mirror_name.removesuffix(".git").replace("/", "_")
+        mirror_path = _GIT_MIRROR_ROOT / f"{mirror_name}.git"
+        lock_path = mirror_path.with_name(f"{mirror_path.name}.lock")
+
+        self._prune_git_mirrors(exclude=mirror_path)
+        try:
+            with _file_lock(lock_path, _GIT_MIRROR_TIMEOUT, cancel_event):
+                return self._update_git_mirror_locked(
+                    git_executable, repo_url, mirror_path, cancel_event
+                )
+        except (TimeoutError, OSError) as e:
+            logger.warning(f"无法使用本地 Git 镜像，将直接从远程克隆: {e}")
+            return None
+
+    def _update_git_mirror_locked(
+        self,
+        git_executable: str,
+        repo_url: str,
+        mirror_path: Path,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> Optional[Path]:
+        """在持有镜像锁的情况下创建或更新镜像，由 _update_git_mirror 调用"""
+        if (mirror_path / "HEAD").is_file():
+            mirror_command = [
+                git_executable,
+                "--git-dir",
+                str(mirror_path),
+                "fetch",
+                "--prune",
+                "origin",
+            ]
+            staging_path = None
+        else:
+            skip_marker = mirror_path.with_name(f"{mirror_path.name}.skip")
+            try:
+                failed_recently = (
+                    time.time() - skip_marker.stat().st_mtime
+                    < _GIT_MIRROR_RETRY_INTERVAL
+                )
+            except FileNotFoundError:
+                failed_recently = False
+            if failed_recently:
+                logger.info(
+                    f"最近创建本地 Git 镜像失败，本次直接从远程克隆: {repo_url}"
+                )
+                return None
+            # 先镜像到临时目录，成功后再整体移动到位，中断的镜像不会留下不完整的目录
+            staging_path = mirror_path.with_name(f"{mirror_path.name}.tmp")
+            self._remove_directory(mirror_path)
+            self._remove_directory(staging_path)
+            mirror_command = [
+                git_executable,
+                "clone",
+                "--mirror",
+                repo_url,
+                str(staging_path),
+            ]
+
+        logger.info(f"更新本地 Git 镜像: {repo_url} -> {mirror_path}")
+        try:
+            result = _run_cancellable(mirror_command, _GIT_MIRROR_TIMEOUT, cancel_event)
+        except (FileNotFoundError, subprocess.TimeoutExpired, OSError) as e:
+            logger.warning(f"更新本地 Git 镜像失败，将直接从远程克隆: {e}")
+            result = None
+        else:
+            if result is not None and result.returncode != 0:
+                logger.warning(
+                    f"更新本地 Git 镜像失败，将直接从远程克隆: {result.stderr.strip()}"
+                )
+
+        if result is None or result.returncode != 0:
+            if staging_path is not None:
+                self._remove_directory(staging_path)
+                # 被取消（result 为 None 且未超时）不算失败；超时或出错时记录标记，暂停重试
+                if cancel_event is None or not cancel_event.is_set():
+                    skip_marker.touch()
+            return None
+
+        if staging_path is not None:
+            try:
+                os.replace(staging_path, mirror_path)
+            except OSError as e:
+                logger.warning(f"移动本地 Git 镜像到 {mirror_path} 失败: {e}")
+                self._remove_directory(staging_path)
+                return None
+            skip_marker.unlink(missing_ok=True)
+        # 更新修改时间作为最近使用时间，供 _prune_git_mirrors 判断
+        os.utime(mirror_path)
+        return mirror_path
+
+    def _prune_git_mirrors(self, exclude: Path) -> None:
+        """删除超过 _GIT_MIRROR_MAX_AGE 未被使用的本地镜像；正被其他部署使用的镜像会被跳过"""
+        try:
+            mirrors = list(_GIT_MIRROR_ROOT.glob("*.git"))
+        except OSError:
+            return
+        expire_before = time.time() - _GIT_MIRROR_MAX_AGE
+        for mirror in mirrors:
+            if mirror == exclude:
+                continue
+            try:
+                if mirror.stat().st_mtime >= expire_before:
+                    continue
+                with _file_lock(mirror.with_name(f"{mirror.name}.lock"), 0):
+                    logger.info(f"清理长期未使用的本地 Git 镜像: {mirror}")
+                    self._remove_directory(mirror)
+            except (TimeoutError, OSError):
+                continue
+
     def _run_git_clone(
-        self, repo_url: str, version_tag: str, deploy_path: Path
+        self,
+        repo_url: str,
+        version_tag: str,
+        deploy_path: Path,
+        cancel_event: Optional[threading.Event] = None,
     ) -> bool:
         """
         克隆指定版本到指定路径。
         源代码将直接位于 deploy_path 下。
+        cancel_event 被置位时终止正在运行的 git 子进程并返回 False。
         """
-        if deploy_path.exists() and any(deploy_path.iterdir()):
+        try:
+            existing_entries = os.listdir(deploy_path)
+        except FileNotFoundError:
+            existing_entries = None
+        if existing_entries:
             logger.error(
                 f"部署路径 {deploy_path} 已存在且非空，无法继续部署。请清空目录后重试。"
             )
@@ -726,6 +1211,15 @@ class DeployManager:
             logger.error(f"获取Git可执行文件失败: {e}")
             return False
 
+        # 启用本地镜像时优先从镜像克隆，重复部署时不再重复下载相同的对象；
+        # 必须使用 file:// URL，否则本地克隆会忽略 --depth
+        mirror_path = (
+            self._update_git_mirror(git_executable, repo_url, cancel_event)
+            if global_config.git_mirror_enabled
+            else None
+        )
+        clone_source = mirror_path.as_uri() if mirror_path else repo_url
+
         clone_command = [
             git_executable,
             "clone",
@@ -733,63 +1227,65 @@ class DeployManager:
             version_tag,
             "--depth",
             "1",  # 浅克隆，只获取指定版本历史
-            repo_url,
+            clone_source,
             str(deploy_path),  # 将仓库内容直接克隆到 deploy_path
         ]
         logger.info(
-            f"准备执行 Git clone 命令: {' '.join(clone_command)} (版本: {version_tag})"
+            f"执行 Git clone: {clone_source} -> {deploy_path} (版本: {version_tag})"
         )
-        logger.info(f"尝试从 {repo_url} 克隆版本 {version_tag} 到 {deploy_path}...")
-        logger.debug(f"执行的 Git 命令: {' '.join(clone_command)}")
 
         try:
-            logger.info("开始执行 Git clone 命令...")
-            process = subprocess.Popen(
-                clone_command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                shell=False,
-                creationflags=subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0,
-            )
-            stdout, stderr = process.communicate(timeout=300)
-            logger.info(f"Git clone 命令执行完毕。返回码: {process.returncode}")
+            # 超时或被取消时 _run_cancellable 会终止并回收子进程
+            result = _run_cancellable(clone_command, 300, cancel_event)
+            if result is None:
+                logger.info(f"已取消从 {repo_url} 克隆")
+                return False
+            logger.info(f"Git clone 命令执行完毕。返回码: {result.returncode}")
 
-            if process.returncode == 0:
+            if result.returncode == 0:
                 logger.info(
                     f"成功从 {repo_url} 克隆版本 {version_tag} 到 {deploy_path}"
                 )
-                try:
-                    cloned_contents = os.listdir(deploy_path)
-                    logger.info(f"克隆后的目录 {deploy_path} 内容: {cloned_contents}")
-                except Exception as e_list:
-                    logger.error(f"列出目录 {deploy_path} 内容失败: {e_list}")
+                # 目录内容仅作诊断用途，只在 DEBUG 级别启用时才列出
+                logger.opt(lazy=True).debug(
+                    "克隆后的目录 {} 内容: {}",
+                    lambda: deploy_path,
+                    lambda: os.listdir(deploy_path),
+                )
 
                 git_dir = deploy_path / ".git"
-                if git_dir.is_dir():
-                    logger.info(f"保留 .git 目录: {git_dir}")
-                else:
+                if mirror_path:
+                    # 从镜像克隆后 origin 指向本地镜像，改回真实的远程仓库地址
+                    subprocess.run(
+                        [
+                            git_executable,
+                            "-C",
+                            str(deploy_path),
+                            "remote",
+                            "set-url",
+                            "origin",
+                            repo_url,
+                        ],
+                        capture_output=True,
+                        check=False,
+                        timeout=30,
+                        creationflags=_CREATE_NO_WINDOW,
+                    )
+                if not git_dir.is_dir():
                     logger.warning(f"克隆完成后未找到 .git 目录: {git_dir}")
                 return True
             else:
                 logger.error(
-                    f"从 {repo_url} 克 clone 失败 (版本: {version_tag})。返回码: {process.returncode}"
+                    f"从 {repo_url} 克 clone 失败 (版本: {version_tag})。返回码: {result.returncode}"
                 )
-                logger.error(f"Git Stdout: {stdout.strip()}")
-                logger.error(f"Git Stderr: {stderr.strip()}")
+                logger.error(f"Git Stdout: {result.stdout.strip()}")
+                logger.error(f"Git Stderr: {result.stderr.strip()}")
                 return False
         except FileNotFoundError:
             logger.error("Git 命令未找到。请确保 Git 已安装并已添加到系统 PATH。")
             return False
         except subprocess.TimeoutExpired:
             logger.error(f"Git 克隆操作超时 ({repo_url}, 版本: {version_tag})。")
-            if process:
-                logger.info(
-                    f"由于超时，正在终止 Git 进程 (PID: {process.pid if hasattr(process, 'pid') else 'N/A'}) "
-                )
-                process.kill()
-                process.communicate()
-                logger.info("Git 进程已终止。")
             return False
         except Exception as e:
             logger.error(
@@ -797,32 +1293,224 @@ class DeployManager:
             )
             return False
 
-    def _handle_remove_readonly(self, func, path, exc_info):
+    def _run_git_clone_race(
+        self,
+        primary_url: str,
+        secondary_url: str,
+        version_tag: str,
+        deploy_path: Path,
+    ) -> bool:
+        """
+        同时从主仓库和备用仓库克隆到两个临时目录，采用最先成功的结果并移动到 deploy_path。
+        主仓库网络不通时无需先等待其失败再尝试备用仓库。
+        一方成功后立即终止另一方的 git 子进程，并在返回前清理其临时目录，
+        避免落败的克隆继续占用带宽或与后续步骤冲突。
         """
-        Error handler for shutil.rmtree.
+        try:
+            existing_entries = os.listdir(deploy_path)
+        except FileNotFoundError:
+            existing_entries = None
+        if existing_entries:
+            logger.error(
+                f"部署路径 {deploy_path} 已存在且非空，无法继续部署。请清空目录后重试。"
+            )
+            return False
+
+        attempts = {
+            primary_url: deploy_path.with_name(f"{deploy_path.name}.a"),
+            secondary_url: deploy_path.with_name(f"{deploy_path.name}.b"),
+        }
+        winner_lock = threading.Lock()
+        winner_url: Optional[str] = None
+        winner_path: Optional[Path] = None
+        # 一方克隆成功后置位，通知另一方终止其 git 子进程
+        cancel_event = threading.Event()
+
+        def _attempt(repo_url: str, attempt_path: Path) -> bool:
+            nonlocal winner_url, winner_path
+            # 清理上次异常中断可能残留的临时目录
+            self._remove_directory(attempt_path)
+            cloned = self._run_git_clone(
+                repo_url, version_tag, attempt_path, cancel_event
+            )
+            with winner_lock:
+                if cloned and winner_path is None:
+                    winner_url = repo_url
+                    winner_path = attempt_path
+                    return True
+            self._remove_directory(attempt_path)
+            return False
+
+        with ThreadPoolExecutor(max_workers=len(attempts)) as executor:
+            futures = [
+                executor.submit(_attempt, repo_url, attempt_path)
+                for repo_url, attempt_path in attempts.items()
+            ]
+            try:
+                for future in as_completed(futures):
+                    if future.result():
+                        break
+            finally:
+                # 终止仍在运行的克隆；退出 with 块时等待其子进程被回收、临时目录被清理
+                cancel_event.set()
+
+        if winner_path is None:
+            return False
+
+        try:
+            if deploy_path.exists():
+                deploy_path.rmdir()  # 此时已确认为空目录
+            os.replace(winner_path, deploy_path)
+        except OSError as e:
+            logger.error(f"移动克隆结果 {winner_path} 到 {deploy_path} 失败: {e}")
+            self._remove_directory(winner_path)
+            return False
+
+        logger.info(f"已采用 {winner_url} 的克隆结果: {deploy_path}")
+        return True
 
-        If the error is due to an access error (read only file)
-        it attempts to add write permission and then retries the
-        remove. If the error is for another reason it re-raises
-        the error.
+    def _handle_remove_readonly(self, func, path, exc):
+        """
+        Error handler for shutil.rmtree (onexc signature).
 
-        Note: exc_info is now a required parameter for onexc.
+        If the error is due to an access error (read only file, or a
+        parent directory without write permission, as seen on git object
+        files) it grants owner/group/other write permission and then
+        retries the remove. If the error is for another reason it
+        re-raises the error.
+        """
+        if not isinstance(exc, PermissionError):
+            raise exc
+
+        writable_bits = stat.S_IRUSR | stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH
+        parent = os.path.dirname(path)
+        if parent and not os.access(parent, os.W_OK):
+            os.chmod(parent, stat.S_IMODE(os.stat(parent).st_mode) | writable_bits)
+        if not os.access(path, os.W_OK):
+            os.chmod(path, stat.S_IMODE(os.lstat(path).st_mode) | writable_bits)
+        # Retry the function
+        func(path)
+
+    def _remove_directory(self, path: Path) -> None:
         """
-        # Check if file access error
-        # exc_info[0] is the exception type, exc_info[1] is the exception instance
-        exc_type, exc_instance, _ = exc_info  # Unpack the exc_info tuple
-        if isinstance(exc_instance, PermissionError):
-            if not os.access(path, os.W_OK):
-                # Try to change the perm
-                os.chmod(path, stat.S_IWUSR)
-                # Retry the function
-                func(path)
+        删除目录树，遇到只读文件时修改权限后重试。
+        仍然失败时退回到忽略错误的删除，并记录警告。
+        """
+        if not os.path.lexists(path):
+            return
+        try:
+            if sys.version_info >= (3, 12):
+                shutil.rmtree(path, onexc=self._handle_remove_readonly)
             else:
-                # Re-raise the error if it's not a permission issue we can fix
-                raise exc_instance  # Raise the original exception instance
-        else:
-            # Re-raise other errors
-            raise exc_instance  # Raise the original exception instance
+                shutil.rmtree(
+                    path,
+                    onerror=lambda func, p, exc_info: self._handle_remove_readonly(
+                        func, p, exc_info[1]
+                    ),
+                )
+        except OSError as e:
+            logger.warning(f"删除目录 {path} 失败，尝试忽略错误删除: {e}")
+            shutil.rmtree(path, ignore_errors=True)
+
+    def deploy_all_services(
+        self,
+        services_to_install: List[Dict[str, Any]],
+        instance_id: str,
+        resolved_deploy_path: Path,
+        instance_port: str,
+    ) -> bool:
+        """
+        并行部署所有服务。各服务使用不同的仓库和虚拟环境，互不依赖，
+        耗时主要在 git / pip 子进程上，因此使用线程池并行执行。
+
+        Args:
+            services_to_install: 服务配置列表
+            instance_id: 实例ID
+            resolved_deploy_path: 主应用部署路径
+            instance_port: 主实例端口
+
+        Returns:
+            bool: 所有服务部署成功返回True，任一服务失败返回False
+        """
+        total_services = len(services_to_install)
+        if total_services == 0:
+            logger.info(f"未指定要部署的服务，跳过服务部署步骤 (实例ID: {instance_id})")
+            return True
+
+        def _deploy(service_config: Dict[str, Any]) -> bool:
+            service_name = service_config.get("name", "unknown")
+            logger.info(f"正在部署服务 '{service_name}' (实例ID: {instance_id})")
+            service_success = self._deploy_service(
+                service_config, instance_id, resolved_deploy_path, instance_port
+            )
+            if service_success:
+                logger.info(f"服务 '{service_name}' 部署完成 (实例ID: {instance_id})")
+            else:
+                logger.error(f"服务 '{service_name}' 部署失败 (实例ID: {instance_id})")
+            return service_success
+
+        services_deployed = 0
+        with ThreadPoolExecutor(max_workers=min(4, total_services)) as executor:
+            futures = [executor.submit(_deploy, cfg) for cfg in services_to_install]
+            for future in as_completed(futures):
+                if future.result():
+                    services_deployed += 1
+                    continue
+                # 任一服务失败即终止整个部署：取消尚未开始的服务，已在运行的等待其结束，
+                # 部署目录由调用方统一清理一次
+                for pending in futures:
+                    pending.cancel()
+                logger.error(
+                    f"服务部署未全部成功 ({services_deployed}/{total_services})，已取消剩余服务 (实例ID: {instance_id})"
+                )
+                return False
+
+        logger.info(
+            f"所有服务 ({services_deployed}/{total_services}) 部署完成 (实例ID: {instance_id})"
+        )
+        return True
+
+    def _check_deploy_preconditions(
+        self, resolved_deploy_path: Path, instance_id: str
+    ) -> bool:
+        """
+        在启动耗时的 Git 克隆之前检查廉价的部署前置条件：
+        Git 与 Python 是否可用、部署目录是否可写、磁盘剩余空间是否足够。
+
+        Args:
+            resolved_deploy_path: 已解析的部署路径
+            instance_id: 实例ID
+
+        Returns:
+            bool: 所有条件满足返回True，否则返回False
+        """
+        try:
+            get_git_executable()
+            get_python_executable()
+        except RuntimeError as e:
+            logger.error(f"部署前置检查失败 (实例ID: {instance_id}): {e}")
+            return False
+
+        # 部署目录可能尚未创建，检查最近的已存在的上级目录
+        existing_dir = resolved_deploy_path
+        while not existing_dir.exists() and existing_dir != existing_dir.parent:
+            existing_dir = existing_dir.parent
+
+        if not os.access(existing_dir, os.W_OK):
+            logger.error(
+                f"部署前置检查失败：目录 {existing_dir} 不可写 (实例ID: {instance_id})"
+            )
+            return False
+
+        free_bytes = shutil.disk_usage(existing_dir).free
+        if free_bytes < _MIN_FREE_DISK_BYTES:
+            logger.error(
+                f"部署前置检查失败：{existing_dir} 所在磁盘剩余空间不足 "
+                f"({free_bytes // (1024 * 1024)} MB < {_MIN_FREE_DISK_BYTES // (1024 * 1024)} MB) (实例ID: {instance_id})"
+            )
+            return False
+
+        return True
 
     def deploy_version(
         self,
@@ -842,26 +1530,25 @@ class DeployManager:
             f"部署操作将在以下绝对路径执行: {resolved_deploy_path} (实例ID: {instance_id})"
         )
 
-        cloned_successfully = self._run_git_clone(
-            self.primary_repo_url, version_tag, resolved_deploy_path
+        if not self._check_deploy_preconditions(resolved_deploy_path, instance_id):
+            return False
+
+        cloned_successfully = self._run_git_clone_race(
+            self.primary_repo_url,
+            self.secondary_repo_url,
+            version_tag,
+            resolved_deploy_path,
         )
         if not cloned_successfully:
-            logger.warning(
-                f"主仓库 {self.primary_repo_url} 克隆失败 (实例ID: {instance_id})，尝试备用仓库 {self.secondary_repo_url}"
-            )
-            cloned_successfully = self._run_git_clone(
-                self.secondary_repo_url, version_tag, resolved_deploy_path
+            logger.error(
+                f"主仓库和备用仓库均克隆失败 (实例ID: {instance_id})。部署中止。"
             )
-            if not cloned_successfully:
-                logger.error(
-                    f"主仓库和备用仓库均克隆失败 (实例ID: {instance_id})。部署中止。"
+            if resolved_deploy_path.exists():
+                logger.info(
+                    f"清理部署失败的路径: {resolved_deploy_path} (实例ID: {instance_id})"
                 )
-                if resolved_deploy_path.exists():
-                    logger.info(
-                        f"清理部署失败的路径: {resolved_deploy_path} (实例ID: {instance_id})"
-                    )
-                    shutil.rmtree(resolved_deploy_path, ignore_errors=True)
-                return False
+                self._remove_directory(resolved_deploy_path)
+            return False
 
         logger.info(f"代码已成功克隆到 {resolved_deploy_path} (实例ID: {instance_id})")
 
@@ -876,59 +1563,31 @@ class DeployManager:
 
         config_dir = resolved_deploy_path / "config"
         template_dir = resolved_deploy_path / "template"
+        env_final_file = resolved_deploy_path / ".env"
+        # 模板文件 -> 目标文件；源文件缺失时由复制本身抛出 FileNotFoundError，无需事先探测
+        template_files_to_copy = [
+            (template_dir / "bot_config_template.toml", config_dir / "bot_config.toml"),
+            (
+                template_dir / "lpmm_config_template.toml",
+                config_dir / "lpmm_config.toml",
+            ),
+            (template_dir / "template.env", env_final_file),
+        ]
         try:
             config_dir.mkdir(parents=True, exist_ok=True)
-            logger.info(f"成功创建/确认文件夹: {config_dir} (实例ID: {instance_id})")
-        except OSError as e:
-            logger.error(
-                f"创建 config 文件夹 {config_dir} 失败 (实例ID: {instance_id}): {e}"
-            )
-            shutil.rmtree(resolved_deploy_path, ignore_errors=True)  # 清理
-            return False
-
-        template_files_to_copy = {
-            "bot_config_template.toml": "bot_config.toml",
-            "lpmm_config_template.toml": "lpmm_config.toml",
-        }
-        for template_name, final_name in template_files_to_copy.items():
-            source_file = template_dir / template_name
-            destination_file = config_dir / final_name
-            try:
-                if not source_file.exists():
-                    logger.error(
-                        f"模板文件 {source_file} 不存在 (实例ID: {instance_id})。"
-                    )
-                    shutil.rmtree(resolved_deploy_path, ignore_errors=True)  # 清理
-                    return False
-                shutil.copy2(source_file, destination_file)
+            for source_file, destination_file in template_files_to_copy:
+                _fast_copy(source_file, destination_file)
+                shutil.copystat(source_file, destination_file)
                 logger.info(
                     f"成功复制 {source_file} 到 {destination_file} (实例ID: {instance_id})"
                 )
-            except Exception as e:
-                logger.error(
-                    f"复制文件 {source_file} 到 {destination_file} 失败 (实例ID: {instance_id}): {e}"
-                )
-                shutil.rmtree(resolved_deploy_path, ignore_errors=True)  # 清理
-                return False
-
-        env_template_file = template_dir / "template.env"
-        env_final_file = resolved_deploy_path / ".env"
-        try:
-            if not env_template_file.exists():
-                logger.error(
-                    f"模板 .env 文件 {env_template_file} 不存在 (实例ID: {instance_id})。"
-                )
-                shutil.rmtree(resolved_deploy_path, ignore_errors=True)  # 清理
-                return False  # Added return False based on similar logic above
-            shutil.copy2(env_template_file, env_final_file)
-            logger.info(
-                f"成功复制 {env_template_file} 到 {env_final_file} (实例ID: {instance_id})"
-            )
+        except FileNotFoundError as e:
+            logger.error(f"模板文件 {e.filename} 不存在 (实例ID: {instance_id})。")
+            self._remove_directory(resolved_deploy_path)  # 清理
+            return False
         except Exception as e:
-            logger.error(
-                f"复制文件 {env_template_file} 到 {env_final_file} 失败 (实例ID: {instance_id}): {e}"
-            )
-            shutil.rmtree(resolved_deploy_path, ignore_errors=True)  # 清理
+            logger.error(f"复制配置模板文件失败 (实例ID: {instance_id}): {e}")
+            self._remove_directory(resolved_deploy_path)  # 清理
             return False
 
         # 修改 .env 文件中的端口配置
@@ -936,41 +1595,18 @@ class DeployManager:
         env_success = modify_env_file(env_final_file, instance_port, instance_id)
         if not env_success:
             logger.error(f"修改主程序 .env 文件失败 (实例ID: {instance_id})")
-            shutil.rmtree(resolved_deploy_path, ignore_errors=True)  # 清理
+            self._remove_directory(resolved_deploy_path)  # 清理
             return False
 
         logger.info(
             f"主应用文件部署完成 (实例ID: {instance_id})。开始处理服务部署..."
         )  # 服务部署逻辑 - 使用通用方法处理所有服务
-        services_deployed = 0
-        total_services = len(services_to_install)
-        for service_config in services_to_install:
-            service_name = service_config.get("name", "unknown")
-            logger.info(
-                f"正在部署服务 '{service_name}' ({services_deployed + 1}/{total_services}) (实例ID: {instance_id})"
-            )
-
-            service_success = self._deploy_service(
-                service_config, instance_id, resolved_deploy_path, instance_port
-            )
-            if not service_success:
-                logger.error(
-                    f"服务 '{service_name}' 部署失败，终止整个部署过程 (实例ID: {instance_id})"
-                )
-                shutil.rmtree(resolved_deploy_path, ignore_errors=True)
-                return False
-
-            services_deployed += 1
-            logger.info(
-                f"服务 '{service_name}' 部署完成 ({services_deployed}/{total_services}) (实例ID: {instance_id})"
-            )
-
-        if total_services == 0:
-            logger.info(f"未指定要部署的服务，跳过服务部署步骤 (实例ID: {instance_id})")
-        else:
-            logger.info(
-                f"所有服务 ({services_deployed}/{total_services}) 部署完成 (实例ID: {instance_id})"
-            )
+        if not self.deploy_all_services(
+            services_to_install, instance_id, resolved_deploy_path, instance_port
+        ):
+            logger.error(f"服务部署失败，终止整个部署过程 (实例ID: {instance_id})")
+            self._remove_directory(resolved_deploy_path)
+            return False
 
         logger.info(
             f"版本 {version_tag} 及所选服务已成功部署到 {resolved_deploy_path} (实例ID: {instance_id})"
@@ -5,6 +5,13 @@ class Config:
     server_port: int = 23456
     debug_level: str = "DEBUG"
     api_prefix: str = "/api/v1"
+    # 允许跨域访问的来源，"*" 表示允许所有来源
+    cors_origins: tuple = ("*",)
+    # 以 SO_REUSEPORT 绑定监听端口，允许多个进程共享同一端口（仅非Windows平台）
+    server_reuse_port: bool = False
+    # 部署时在本地缓存远程仓库的裸镜像并从镜像克隆。重复部署可少下载对象，
+    # 但首次部署需要额外下载完整历史，默认关闭
+    git_mirror_enabled: bool = False
 
     def __init__(self):
         pass
@@ -1,32 +1,27 @@
 import os
 import sys
-from rich.traceback import install
+from sqlalchemy import bindparam, event, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import sessionmaker
 from sqlmodel import create_engine, SQLModel, Session, select
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 # PtyLog 模型现在从 database_model.py 导入
 from src.utils.database_model import DB_Service
 from src.utils.logger import get_module_logger  # 添加 logger 导入
 
-install(extra_lines=3)  # rich traceback 安装，用于美化异常输出
+# 资源根目录只与运行环境有关，在模块加载时计算一次
+if hasattr(sys, "_MEIPASS"):
+    # PyInstaller打包环境：数据文件放在exe同级目录，而不是临时解压目录
+    _BASE_PATH = os.path.dirname(sys.executable)
+else:
+    # 开发环境中的路径
+    _BASE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 
 
 def get_resource_path(relative_path):
     """获取资源文件的绝对路径，支持PyInstaller打包环境"""
-    try:
-        # PyInstaller打包环境：获取exe文件所在目录
-        # 使用sys.executable获取exe文件路径，而不是临时目录
-        if hasattr(sys, "_MEIPASS"):
-            # 在PyInstaller环境中，数据文件应该放在exe同级目录
-            base_path = os.path.dirname(sys.executable)
-        else:
-            # 这个分支实际上不会执行，但保留以防万一
-            base_path = sys._MEIPASS
-    except AttributeError:
-        # 开发环境中的路径
-        base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-
-    return os.path.join(base_path, relative_path)
+    return os.path.join(_BASE_PATH, relative_path)
 
 
 # 定义数据库文件路径
@@ -41,8 +36,30 @@ sqlite_url = f"sqlite:///{_DB_FILE}"
 engine = create_engine(
     sqlite_url,
     echo=False,  # echo=True 用于在开发时打印SQL语句，生产环境可以关闭
+    # 允许连接在 FastAPI 线程池的不同线程间复用；写锁冲突时最多等待 30 秒
+    connect_args={"check_same_thread": False, "timeout": 30},
 )
 
+# 每个新连接建立时执行的 SQLite PRAGMA
+_SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",  # 读写互不阻塞
+    "PRAGMA synchronous=NORMAL",  # WAL 模式下仅在检查点时 fsync
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",  # 64 MiB 页缓存
+    "PRAGMA mmap_size=268435456",  # 256 MiB 内存映射
+)
+
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """为每个新建的 SQLite 连接应用 PRAGMA 设置。"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in _SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
 
 def create_db_and_tables():
     """创建数据库和所有在 SQLModel 元数据中定义的表。"""
@@ -52,12 +69,63 @@ def create_db_and_tables():
     # 为了明确，可以确保 database_model 在调用此函数之前已被导入。
     # 例如，在 main.py 或 server.py 的顶部导入。
     SQLModel.metadata.create_all(engine)
+    _ensure_service_unique_index()
+
+
+def _ensure_service_unique_index():
+    """
+    为旧版本创建的数据库补建 (instance_id, name) 唯一索引。
+    create_all 不会为已存在的表添加索引；建索引前先清理重复的服务记录，保留最早的一条。
+    """
+    service_table = DB_Service.__table__
+    with engine.begin() as conn:
+        result = conn.execute(
+            text(
+                f"DELETE FROM {service_table.name} WHERE id NOT IN "
+                f"(SELECT MIN(id) FROM {service_table.name} GROUP BY instance_id, name)"
+            )
+        )
+        if result.rowcount:
+            logger_db.warning(f"已清理 {result.rowcount} 条重复的服务记录。")
+        for index in service_table.indexes:
+            index.create(conn, checkfirst=True)
+
+
+def upsert_services(session: Session, services: List[Dict[str, Any]]):
+    """
+    按 (instance_id, name) 批量插入服务记录，已存在时更新其余字段。
+    在调用方的事务中执行，由调用方负责提交。
+
+    Args:
+        session: 数据库会话
+        services: 服务字段字典列表，需包含 instance_id、name、path、run_cmd、status、port
+    """
+    if not services:
+        return
+    statement = sqlite_insert(DB_Service).values(services)
+    statement = statement.on_conflict_do_update(
+        index_elements=["instance_id", "name"],
+        set_={
+            column: statement.excluded[column]
+            for column in ("path", "run_cmd", "status", "port")
+        },
+    )
+    session.execute(statement)
 
 
 # PTY 日志相关方法
 class Database:
     def __init__(self, engine_to_use):
         self.engine = engine_to_use
+        # 会话工厂：提交后不使对象过期，避免访问已提交对象的属性时重新 SELECT
+        self._session_factory = sessionmaker(
+            bind=engine_to_use, class_=Session, expire_on_commit=False
+        )
+        # 预先构造服务查询语句，每次查询只绑定参数，复用 SQLAlchemy 的编译缓存
+        self._service_details_stmt = select(DB_Service).where(
+            DB_Service.instance_id == bindparam("instance_id"),
+            DB_Service.name == bindparam("service_name"),
+        )
 
     async def get_service_details(
         self, instance_id: str, service_name: str
@@ -65,11 +133,11 @@ class Database:
         """
         从数据库检索特定实例和服务的详细信息。
         """
-        with Session(self.engine) as session:
-            statement = select(DB_Service).where(
-                DB_Service.instance_id == instance_id, DB_Service.name == service_name
-            )
-            return session.exec(statement).first()
+        with self._session_factory() as session:
+            return session.exec(
+                self._service_details_stmt,
+                params={"instance_id": instance_id, "service_name": service_name},
+            ).first()
 
 
 # 全局数据库实例 (或者通过依赖注入管理)
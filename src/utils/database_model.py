@@ -1,3 +1,4 @@
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel  # 导入SQLModel
 from typing import Optional
 import datetime
@@ -28,6 +29,9 @@ class DB_Instance(SQLModel, table=True):
 
 
 class DB_Service(SQLModel, table=True):
+    # 同一实例下服务名唯一，按 (instance_id, name) 查询时走索引，并作为 upsert 的冲突目标
+    __table_args__ = (Index("ix_service_iid_name", "instance_id", "name", unique=True),)
+
     id: Optional[int] = Field(
         default=None, primary_key=True
     )  # 服务记录的数据库内部ID，主键
@@ -13,12 +13,15 @@ def hash_string_sha1_salt(input_string: str, salt: str | None = None) -> str:
     返回:
         哈希后的字符串。
     """
+    # 直接在字节层面拼接盐值和输入，省去十六进制编码与字符串拼接
     if salt is None:
-        salt = os.urandom(16).hex()  # 生成一个16字节的随机盐值并转换为十六进制
+        salt_bytes = os.urandom(16)  # 生成一个16字节的随机盐值
+    else:
+        salt_bytes = salt.encode("utf-8")
 
-    salted_string = salt + input_string
-    hashed_string = hashlib.sha1(salted_string.encode("utf-8")).hexdigest()
-    return f"{hashed_string}"
+    hasher = hashlib.sha1(salt_bytes)
+    hasher.update(input_string.encode("utf-8"))
+    return hasher.hexdigest()
 
 
 def generate_instance_id(instance_name: str) -> str:
@@ -9,22 +9,18 @@ from pathlib import Path
 from .config import global_config
 
 
+# 资源根目录只与运行环境有关，在模块加载时计算一次
+if hasattr(sys, "_MEIPASS"):
+    # PyInstaller打包环境：数据文件放在exe同级目录，而不是临时解压目录
+    _BASE_PATH = os.path.dirname(sys.executable)
+else:
+    # 开发环境中的路径
+    _BASE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+
 def get_resource_path(relative_path):
     """获取资源文件的绝对路径，支持PyInstaller打包环境"""
-    try:
-        # PyInstaller打包环境：获取exe文件所在目录
-        # 使用sys.executable获取exe文件路径，而不是临时目录
-        if hasattr(sys, "_MEIPASS"):
-            # 在PyInstaller环境中，数据文件应该放在exe同级目录
-            base_path = os.path.dirname(sys.executable)
-        else:
-            # 这个分支实际上不会执行，但保留以防万一
-            base_path = sys._MEIPASS
-    except AttributeError:
-        # 开发环境中的路径
-        base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-
-    return os.path.join(base_path, relative_path)
+    return os.path.join(_BASE_PATH, relative_path)
 
 
 # 保存原生处理器ID
@@ -48,6 +44,9 @@ _custom_style_handlers: dict[Tuple[str, str], List[int]] = {}  # 记录自定义
 current_file_path = Path(__file__).resolve()
 # 日志根目录 - 支持通过环境变量自定义
 LOG_ROOT = os.environ.get("LOGS_DIR", get_resource_path("logs"))
+# 文件处理器写入的日志目录，在模块加载时创建一次
+LOG_DIR = Path(get_resource_path("logs"))
+LOG_DIR.mkdir(parents=True, exist_ok=True)
 
 # LOG_LEVEL = global_config.get("Debug", {}).get("level", "INFO").upper()
 # print(global_config.debug_level)
@@ -102,53 +101,100 @@ class LogConfig:
         self.config.update(kwargs)
 
 
-def get_module_logger(
-    module: Union[str, ModuleType],
-    *,
-    console_level: Optional[str] = None,
-    file_level: Optional[str] = None,
-    extra_handlers: Optional[List[dict]] = None,
-    config: Optional[LogConfig] = None,
-) -> LoguruLogger:
-    module_name = module if isinstance(module, str) else module.__name__
-    current_config = config.config if config else DEFAULT_CONFIG
+# 共享处理器（控制台 + 文件）的ID，首次创建模块日志记录器时添加一次，所有模块共用
+_shared_handler_ids: List[int] = []
+# 使用独立配置的模块，由各自的处理器输出，共享处理器不再重复输出
+_dedicated_modules: set[str] = set()
+# 模块名 -> 已绑定模块名的日志记录器
+_logger_cache: dict[str, LoguruLogger] = {}
 
-    # 清理旧处理器
-    if module_name in _handler_registry:
-        for handler_id in _handler_registry[module_name]:
-            logger.remove(handler_id)
-        del _handler_registry[module_name]
 
+def _shared_handler_filter(record: dict) -> bool:
+    """共享处理器的过滤器：输出已注册且未使用独立配置的模块日志"""
+    module_name = record["extra"].get("module")
+    return (
+        module_name in _handler_registry
+        and module_name not in _dedicated_modules
+        and "custom_style" not in record["extra"]
+    )
+
+
+def _add_console_and_file_handlers(config: dict, log_filter) -> List[int]:
+    """按配置添加控制台处理器和文件处理器，返回处理器ID列表"""
     handler_ids = []
 
     # 控制台处理器
     console_id = logger.add(
         sink=sys.stderr,
         level=global_config.debug_level,
-        format=current_config["console_format"],
-        filter=lambda record: record["extra"].get("module") == module_name
-        and "custom_style" not in record["extra"],
+        format=config["console_format"],
+        filter=log_filter,
         enqueue=True,
+        # 记录异常时只输出普通回溯，不展开整个调用栈，也不逐帧格式化局部变量
+        backtrace=False,
+        diagnose=False,
     )
     handler_ids.append(console_id)  # 文件处理器
-    log_dir = Path(get_resource_path("logs"))
-    log_dir.mkdir(parents=True, exist_ok=True)
-    log_file = log_dir / "{time:YYYY-MM-DD}.log"
-    log_file.parent.mkdir(parents=True, exist_ok=True)
+    log_file = LOG_DIR / "{time:YYYY-MM-DD}.log"
 
     file_id = logger.add(
         sink=str(log_file),
         level="DEBUG",
-        format=current_config["file_format"],
-        rotation=current_config["rotation"],
-        retention=current_config["retention"],
-        compression=current_config["compression"],
+        format=config["file_format"],
+        rotation=config["rotation"],
+        retention=config["retention"],
+        compression=config["compression"],
         encoding="utf-8",
-        filter=lambda record: record["extra"].get("module") == module_name
-        and "custom_style" not in record["extra"],
+        filter=log_filter,
         enqueue=True,
+        backtrace=False,
+        diagnose=False,
     )
     handler_ids.append(file_id)
+    return handler_ids
+
+
+def get_module_logger(
+    module: Union[str, ModuleType],
+    *,
+    console_level: Optional[str] = None,
+    file_level: Optional[str] = None,
+    extra_handlers: Optional[List[dict]] = None,
+    config: Optional[LogConfig] = None,
+) -> LoguruLogger:
+    module_name = module if isinstance(module, str) else module.__name__
+
+    # 未指定独立配置或额外处理器时，同名模块直接复用已创建的日志记录器
+    if config is None and not extra_handlers and module_name in _logger_cache:
+        return _logger_cache[module_name]
+
+    # 所有模块共用一组控制台/文件处理器，避免每个模块各自添加处理器和队列线程
+    if not _shared_handler_ids:
+        _shared_handler_ids.extend(
+            _add_console_and_file_handlers(DEFAULT_CONFIG, _shared_handler_filter)
+        )
+
+    # 清理旧处理器
+    if module_name in _handler_registry:
+        for handler_id in _handler_registry[module_name]:
+            logger.remove(handler_id)
+        del _handler_registry[module_name]
+    _dedicated_modules.discard(module_name)
+
+    handler_ids = []
+
+    # 指定了独立配置的模块使用自己的处理器
+    if config:
+        handler_ids.extend(
+            _add_console_and_file_handlers(
+                config.config,
+                lambda record: (
+                    record["extra"].get("module") == module_name
+                    and "custom_style" not in record["extra"]
+                ),
+            )
+        )
+        _dedicated_modules.add(module_name)
 
     # 额外处理器
     if extra_handlers:
@@ -159,4 +205,6 @@ def get_module_logger(
     # 更新注册表
     _handler_registry[module_name] = handler_ids
 
-    return logger.bind(module=module_name)
+    module_logger = logger.bind(module=module_name)
+    _logger_cache[module_name] = module_logger
+    return module_logger
@@ -1,17 +1,145 @@
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware  # 新增导入
-from typing import Optional
-from uvicorn import Config, Server as UvicornServer
+from starlette.datastructures import Headers
+from starlette.routing import BaseRoute, Mount
+from starlette.types import ASGIApp, Message, Send
+from pydantic import BaseModel, Field
+from typing import Any, List, Optional, Tuple, Union
+from uvicorn import Config
+from importlib.util import find_spec
 import asyncio
+import httpx
+import socket
+import sys
 
 # import os
 from .logger import get_module_logger
 from .config import global_config
-from rich.traceback import install
 
 logger = get_module_logger("服务器")
 
-install(extra_lines=3)
+# 非Windows平台优先使用基于libuv的uvloop事件循环（uvloop不支持Windows）
+_USE_UVLOOP = sys.platform != "win32" and find_spec("uvloop") is not None
+# 已安装httptools时使用C实现的HTTP解析器，否则回退到纯Python的h11
+_HTTP_IMPL = "httptools" if find_spec("httptools") is not None else "h11"
+
+# 后端接口实际使用的 HTTP 方法，CORS 预检响应头在中间件初始化时据此拼接一次
+_CORS_ALLOW_METHODS = ("GET", "POST", "PUT", "DELETE", "OPTIONS")
+# 浏览器缓存预检结果的时间（秒），避免前端对每个接口反复发送 OPTIONS 请求
+# （部分浏览器会将其截断到自身上限，例如 Chromium 为 2 小时）
+_CORS_MAX_AGE = 86400
+
+# 单个批量请求最多包含的子请求数量
+_BATCH_MAX_REQUESTS = 50
+# 批量端点分发子请求时附带的请求头，批量端点拒绝带有此请求头的请求，防止递归调用自身
+_BATCH_SUBREQUEST_HEADER = "x-mailauncher-batch-subrequest"
+
+
+class FastCORSMiddleware(CORSMiddleware):
+    """预先编码 CORS 响应头的 CORSMiddleware
+
+    允许任意来源且不允许携带凭据时，简单请求附加的 CORS 响应头是常量，
+    初始化时编码一次，之后直接追加到响应头列表，不再逐个响应构造 MutableHeaders。
+    其他配置（以及响应已自带相关响应头的少见情况）仍交给 CORSMiddleware 处理。
+    """
+
+    _VARY_ORIGIN = (b"vary", b"Origin")
+
+    def __init__(self, app: ASGIApp, **kwargs):
+        super().__init__(app, **kwargs)
+        self._static_simple_headers = (
+            self.allow_all_origins and not self.allow_credentials
+        )
+        self._simple_headers_raw = [
+            (key.lower().encode("latin-1"), value.encode("latin-1"))
+            for key, value in self.simple_headers.items()
+        ]
+        # 响应中已存在这些响应头时需要合并或覆盖，回退到父类处理
+        self._merge_header_names = frozenset(
+            [b"vary", *(key for key, _ in self._simple_headers_raw)]
+        )
+
+    async def send(self, message: Message, send: Send, request_headers: Headers):
+        if not self._static_simple_headers or message["type"] != "http.response.start":
+            await super().send(message, send, request_headers)
+            return
+
+        raw_headers = message.setdefault("headers", [])
+        if not isinstance(raw_headers, list) or any(
+            name in self._merge_header_names for name, _ in raw_headers
+        ):
+            await super().send(message, send, request_headers)
+            return
+
+        if "origin" in request_headers:
+            raw_headers.extend(self._simple_headers_raw)
+        raw_headers.append(self._VARY_ORIGIN)
+        await send(message)
+
+
+class BatchSubRequest(BaseModel):
+    method: str = Field(default="GET", description="HTTP 方法")
+    path: str = Field(
+        ..., description="请求路径（可带查询参数），例如 /api/v1/instances"
+    )
+    body: Optional[Any] = Field(default=None, description="JSON 请求体")
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchSubRequest] = Field(
+        ...,
+        max_length=_BATCH_MAX_REQUESTS,
+        description="要批量执行的子请求列表",
+    )
+
+
+class BatchSubResponse(BaseModel):
+    status: int
+    body: Optional[Any] = None
+
+
+class BatchResponse(BaseModel):
+    responses: List[BatchSubResponse]
+
+
+def new_event_loop() -> asyncio.AbstractEventLoop:
+    """创建事件循环：uvloop可用时使用uvloop，否则使用标准asyncio事件循环"""
+    if _USE_UVLOOP:
+        import uvloop
+
+        return uvloop.new_event_loop()
+    return asyncio.new_event_loop()
+
+
+def bind_sockets(
+    host: str, port: int, reuse_port: bool = False
+) -> Optional[List[socket.socket]]:
+    """预先绑定监听套接字，供 UvicornServer.serve(sockets=...) 使用
+
+    套接字可被子进程继承，便于平滑重启时交接监听端口；reuse_port 为 True 时设置
+    SO_REUSEPORT，允许多个进程绑定同一端口并由内核分配连接。
+    Windows 不支持 SO_REUSEPORT，返回 None，由 Uvicorn 按 host/port 自行绑定。
+    """
+    if sys.platform == "win32" or not hasattr(socket, "SO_REUSEPORT"):
+        return None
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if reuse_port:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind((host, port))
+        sock.set_inheritable(True)
+    except OSError:
+        sock.close()
+        raise
+    return [sock]
+
+
+def run_async(coro):
+    """在 new_event_loop 创建的事件循环中运行协程直至完成，用于替代 asyncio.run"""
+    with asyncio.Runner(loop_factory=new_event_loop) as runner:
+        return runner.run(coro)
 
 
 class Server:
@@ -24,17 +152,23 @@ class Server:
         self.app = FastAPI(title=app_name)
         self._host: str = "127.0.0.1"
         self._port: int = 8080
-        self._server: Optional[UvicornServer] = None
+        # 待注册的路由，在构建服务器配置时统一注册；注册完成后置为 None，路由表不再接受新路由
+        self._pending_routers: Optional[
+            List[Tuple[Union[APIRouter, List[BaseRoute]], str]]
+        ] = []
         self.set_address(host, port)
 
         self.app.add_middleware(
-            CORSMiddleware,
-            allow_origins=["*"],
-            allow_credentials=True,
-            allow_methods=["*"],
+            FastCORSMiddleware,
+            allow_origins=list(global_config.cors_origins),
+            # 后端不使用 Cookie 或 HTTP 认证；不允许携带凭据时，通配来源的响应头是静态的，
+            # 无需对每个请求回显 Origin
+            allow_credentials=False,
+            allow_methods=_CORS_ALLOW_METHODS,
             allow_headers=["*"],
+            max_age=_CORS_MAX_AGE,
         )
-        logger.info("CORS 中间件已配置为允许所有请求。")
+        logger.info(f"CORS 中间件已配置，允许的来源: {global_config.cors_origins}")
 
     def register_router(self, router: APIRouter, prefix: str = ""):
         """注册路由
@@ -57,8 +191,92 @@ class Server:
 
             # 注册路由，添加前缀 "/api/v1"
             server.register_router(router, prefix="/api/v1")
+
+        路由会先缓存，在 build_config / get_app 时统一注册到应用；
+        此后路由表被冻结，再调用本方法会抛出 RuntimeError。
+        """
+        if self._pending_routers is None:
+            raise RuntimeError("路由表已冻结，无法在服务器启动后注册路由")
+        self._pending_routers.append((router, prefix))
+
+    def register_routes(self, routes: List[BaseRoute], prefix: str = ""):
+        """直接注册 Starlette 路由列表
+
+        与 register_router 不同，这些路由不经过 include_router 的逐路由依赖解析，
+        带前缀时以 Mount 挂载，否则直接追加到应用路由表。适合不需要出现在
+        OpenAPI 文档中的轻量路由（例如 WebSocket 或静态响应）。
+
+        示例:
+            server.register_routes([Route("/ping", ping)], prefix="/internal")
         """
-        self.app.include_router(router, prefix=prefix)
+        if self._pending_routers is None:
+            raise RuntimeError("路由表已冻结，无法在服务器启动后注册路由")
+        self._pending_routers.append((routes, prefix))
+
+    def enable_batch_endpoint(self, path: str = "/batch"):
+        """注册批量请求端点
+
+        客户端可以把多个请求合并为一次 POST 发送，服务端在进程内并发分发到各个路由，
+        避免前端页面加载时逐个发起 HTTP 请求（及其 CORS 预检）。子请求直接调用 ASGI 应用，
+        不经过网络，响应按请求顺序返回。单次最多包含 _BATCH_MAX_REQUESTS 个子请求，
+        且子请求不能再调用批量端点。
+
+        请求体示例:
+            {"requests": [{"method": "GET", "path": "/api/v1/instances"}]}
+        """
+        router = APIRouter()
+        # 子请求处理器抛出的异常转换为 500 响应，不影响同一批次中的其他子请求
+        transport = httpx.ASGITransport(app=self.app, raise_app_exceptions=False)
+
+        async def dispatch(
+            client: httpx.AsyncClient, sub: BatchSubRequest
+        ) -> BatchSubResponse:
+            try:
+                url = httpx.URL(sub.path)
+            except httpx.InvalidURL:
+                return BatchSubResponse(status=400, body={"detail": "无效的请求路径"})
+            try:
+                response = await client.request(sub.method.upper(), url, json=sub.body)
+            except Exception as e:
+                logger.error(f"批量请求中的子请求 {sub.method} {sub.path} 失败: {e}")
+                return BatchSubResponse(status=500, body={"detail": str(e)})
+            try:
+                body = response.json()
+            except ValueError:
+                body = response.text
+            return BatchSubResponse(status=response.status_code, body=body)
+
+        @router.post(path, response_model=BatchResponse)
+        async def batch(request: BatchRequest, http_request: Request) -> BatchResponse:
+            # 按请求头而非路径判断，路径经过规范化（如 ./ 或 ../）后仍可能指向本端点
+            if _BATCH_SUBREQUEST_HEADER in http_request.headers:
+                raise HTTPException(status_code=400, detail="不允许嵌套批量请求")
+            async with httpx.AsyncClient(
+                transport=transport,
+                base_url="http://internal",
+                headers={_BATCH_SUBREQUEST_HEADER: "1"},
+            ) as client:
+                responses = await asyncio.gather(
+                    *(dispatch(client, sub) for sub in request.requests)
+                )
+            return BatchResponse(responses=list(responses))
+
+        self.register_router(router)
+
+    def _finalize_routes(self):
+        """将缓存的路由统一注册到应用，并冻结路由表"""
+        if self._pending_routers is None:
+            return
+        for routes, prefix in self._pending_routers:
+            if isinstance(routes, APIRouter):
+                self.app.include_router(routes, prefix=prefix)
+            elif prefix:
+                self.app.router.routes.append(Mount(prefix, routes=routes))
+            else:
+                self.app.router.routes.extend(routes)
+        self._pending_routers = None
+        # 路由表已变化，OpenAPI 文档在首次访问时重新生成
+        self.app.openapi_schema = None
 
     def set_address(self, host: Optional[str] = None, port: Optional[int] = None):
         """设置服务器地址和端口"""
@@ -67,62 +285,48 @@ class Server:
         if port:
             self._port = port
 
-    def run(self):
-        """启动服务器"""
-        # 禁用 uvicorn 默认日志和访问日志
-        config = Config(app=self.app, host=self._host, port=self._port)
-        self._server = UvicornServer(config=config)
-        try:
-            logger.info(
-                f"服务器准备在 http://{self._host}:{self._port} 启动 (同步模式)"
-            )
-            asyncio.run(self._server.serve())
-            logger.info(f"服务器已在 http://{self._host}:{self._port} 停止")
-        except KeyboardInterrupt:
-            logger.info(
-                "服务器接收到中断信号 (KeyboardInterrupt)，将通过 finally 关闭。"
-            )
-            raise  # Uvicorn's serve() should handle KI and exit cleanly, this ensures propagation if not.
-        except Exception as e:
-            logger.error(f"服务器运行期间发生错误: {str(e)}")
-            # The original code called self.shutdown() here too.
-            # UvicornServer.serve() has its own finally that calls its shutdown.
-            # Re-raising to match original behavior of propagating the error.
-            raise RuntimeError(f"服务器运行错误: {str(e)}") from e
-        finally:
-            logger.info("服务器 run 方法执行完毕，执行 finally 中的 shutdown。")
-            self.shutdown()  # Call synchronous shutdown
-
-    def shutdown(self):
-        """安全关闭服务器"""
-        if self._server:
-            logger.info("请求关闭服务器...")
-            # Check if Uvicorn server instance thinks it's started
-            if hasattr(self._server, "started") and self._server.started:
-                self._server.should_exit = True  # Signal Uvicorn server to exit
-                try:
-                    # Run Uvicorn's own async shutdown method
-                    logger.info("执行 UvicornServer.shutdown()...")
-                    asyncio.run(self._server.shutdown())
-                    logger.info("UvicornServer.shutdown() 调用完成。")
-                except RuntimeError as e:
-                    # Handle cases where asyncio.run() cannot be called (e.g., another loop running, loop closed)
-                    logger.warning(
-                        f"关闭服务器时执行 asyncio.run(self._server.shutdown()) 出错: {e}. 服务器可能已在关闭过程中或事件循环不可用。"
-                    )
-                except Exception as e:
-                    logger.error(f"关闭服务器时发生未知错误: {e}")
-            else:
-                logger.info(
-                    "服务器未在运行状态或已被标记为退出，无需执行 UvicornServer.shutdown()。"
-                )
-            self._server = None  # Clear our reference to the server instance
-        else:
-            logger.info("服务器实例不存在，无需关闭。")
+    def build_config(self, **overrides) -> Config:
+        """构建 Uvicorn 配置
+
+        默认使用当前地址，选择可用的最快事件循环和HTTP解析器实现，并关闭访问日志；
+        overrides 中的参数会覆盖默认值。
+        """
+        self._finalize_routes()
+        options = {
+            "app": self.app,
+            "host": self._host,
+            "port": self._port,
+            "loop": "uvloop" if _USE_UVLOOP else "asyncio",
+            "http": _HTTP_IMPL,
+            # 不记录逐请求的访问日志，也不为每个响应生成 Server/Date 响应头
+            "access_log": False,
+            "server_header": False,
+            "date_header": False,
+        }
+        options.update(overrides)
+        return Config(**options)
 
     def get_app(self) -> FastAPI:
         """获取 FastAPI 实例"""
+        self._finalize_routes()
         return self.app
 
 
-global_server = Server(host=global_config.server_host, port=global_config.server_port)
+_global_server: Optional[Server] = None
+
+
+def get_global_server() -> Server:
+    """获取全局服务器实例，首次调用时才创建，避免导入本模块时就构建 FastAPI 应用"""
+    global _global_server
+    if _global_server is None:
+        _global_server = Server(
+            host=global_config.server_host, port=global_config.server_port
+        )
+    return _global_server
+
+
+def __getattr__(name: str):
+    """兼容旧的 `from src.utils.server import global_server` 写法，按需创建全局实例"""
+    if name == "global_server":
+        return get_global_server()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
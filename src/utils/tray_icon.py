@@ -5,22 +5,68 @@
 """
 
 import threading
+from functools import lru_cache
+from importlib.util import find_spec
 
 # import asyncio
 from pathlib import Path
-from typing import Optional, Callable, Any
+from typing import Optional, Callable, Any, Tuple
 from src.utils.logger import get_module_logger
 
 logger = get_module_logger("托盘图标")
 
-try:
-    import pystray
-    from PIL import Image
-
-    TRAY_AVAILABLE: bool = True
-except ImportError:
+# 只检查 pystray 和 PIL 是否已安装，真正的导入推迟到启动托盘时，
+# 未使用托盘时无需加载 PIL 的 C 扩展
+TRAY_AVAILABLE: bool = find_spec("pystray") is not None and find_spec("PIL") is not None
+if not TRAY_AVAILABLE:
     logger.warning("pystray 或 PIL 库未安装，托盘图标功能不可用")
-    TRAY_AVAILABLE: bool = False
+
+# 已导入的 pystray 和 PIL.Image 模块，首次使用时由 _import_tray_modules 填充
+_pystray: Any = None
+_Image: Any = None
+
+
+def _import_tray_modules() -> Tuple[Any, Any]:
+    """导入并缓存 pystray 和 PIL.Image 模块"""
+    global _pystray, _Image
+    if _pystray is None:
+        import pystray
+        from PIL import Image
+
+        _pystray, _Image = pystray, Image
+    return _pystray, _Image
+
+
+# 托盘图标文件路径及托盘图标标准尺寸
+_ICON_PATH = Path(__file__).parent.parent.parent / "assets" / "maimai.ico"
+_ICON_SIZE = (64, 64)
+# 默认图标（钢蓝色方块）的原始 RGBA 像素数据，图标文件不可用时直接构造图像
+_DEFAULT_ICON_BYTES = bytes((70, 130, 180, 255)) * (_ICON_SIZE[0] * _ICON_SIZE[1])
+
+
+@lru_cache(maxsize=1)
+def _load_tray_image() -> Optional[Any]:  # Returns PIL.Image.Image or None
+    """加载并缩放托盘图标图像，结果会被缓存，托盘重启时无需重新读取和缩放"""
+    _, Image = _import_tray_modules()
+    try:
+        # 尝试使用项目中的图标文件
+        if _ICON_PATH.exists():
+            # 对于 .ico 文件，直接用 PIL 打开
+            with Image.open(_ICON_PATH) as image:
+                # 调整大小为托盘图标标准尺寸
+                return image.resize(_ICON_SIZE, Image.Resampling.LANCZOS)
+        else:
+            logger.warning(f"图标文件不存在: {_ICON_PATH}")
+    except Exception as e:
+        logger.warning(f"加载图标文件失败: {e}")
+
+    # 如果无法加载图标文件，创建一个简单的默认图标
+    try:
+        # 使用预先生成的像素数据创建一个简单的彩色方块作为默认图标
+        return Image.frombytes("RGBA", _ICON_SIZE, _DEFAULT_ICON_BYTES)
+    except Exception as e:
+        logger.error(f"创建默认图标失败: {e}")
+        return None
 
 
 class TrayIcon:
@@ -32,52 +78,30 @@ class TrayIcon:
         self.running: bool = False
 
     def create_image(self) -> Optional[Any]:  # Returns PIL.Image.Image or None
-        """创建托盘图标图像"""
-        try:
-            # 尝试使用项目中的图标文件
-            icon_path = Path(__file__).parent.parent.parent / "assets" / "maimai.ico"
-            if icon_path.exists():
-                # 对于 .ico 文件，直接用 PIL 打开
-                image = Image.open(icon_path)
-                # 调整大小为托盘图标标准尺寸
-                image = image.resize((64, 64), Image.Resampling.LANCZOS)
-                return image
-            else:
-                logger.warning(f"图标文件不存在: {icon_path}")
-        except Exception as e:
-            logger.warning(f"加载图标文件失败: {e}")
-
-        # 如果无法加载图标文件，创建一个简单的默认图标
-        try:
-            # 创建一个简单的彩色方块作为默认图标
-            image = Image.new("RGBA", (64, 64), (70, 130, 180, 255))  # 钢蓝色
-            return image
-        except Exception as e:
-            logger.error(f"创建默认图标失败: {e}")
-            return None
+        """创建托盘图标图像（返回缓存图像的副本，调用方可自由修改）"""
+        image = _load_tray_image()
+        return image.copy() if image is not None else None
 
     def quit_action(self, icon: Any, item: Any) -> None:
-        """退出应用程序"""
+        """退出应用程序
+
+        关闭回调只负责发出退出信号（线程安全且不阻塞），因此直接在托盘线程中调用，
+        无需另起线程。
+        """
         logger.info("用户通过托盘图标请求退出应用程序")
         self.running = False
 
-        # 延迟执行关闭回调，给托盘图标时间完成操作
-        def delayed_shutdown():
+        try:
+            if self.shutdown_callback:
+                self.shutdown_callback()
+        except Exception as e:
+            logger.error(f"执行关闭回调时发生错误: {e}")
+        finally:
+            # 确保图标停止
             try:
-                if self.shutdown_callback:
-                    self.shutdown_callback()
+                icon.stop()
             except Exception as e:
-                logger.error(f"执行关闭回调时发生错误: {e}")
-            finally:
-                # 确保图标停止
-                try:
-                    icon.stop()
-                except Exception as e:
-                    logger.error(f"停止托盘图标时发生错误: {e}")
-
-        # 在新线程中执行关闭，避免阻塞托盘图标
-        shutdown_thread = threading.Thread(target=delayed_shutdown, daemon=True)
-        shutdown_thread.start()
+                logger.error(f"停止托盘图标时发生错误: {e}")
 
     def show_status(self, icon: Any, item: Any) -> None:
         """显示状态信息（可扩展）"""
@@ -86,6 +110,7 @@ class TrayIcon:
 
     def create_menu(self) -> Any:
         """创建托盘菜单"""
+        pystray, _ = _import_tray_modules()
         return pystray.Menu(
             pystray.MenuItem("MaiLauncher Backend", self.show_status, default=True),
             pystray.Menu.SEPARATOR,
@@ -101,6 +126,7 @@ class TrayIcon:
             return
 
         try:
+            pystray, _ = _import_tray_modules()
             image = self.create_image()
             if image is None:
                 logger.error("无法创建托盘图标图像")